@@ -0,0 +1,144 @@
+"""Gunicorn settings for production.
+
+Every setting can be overridden with ``GUNICORN_*`` environment variable.
+Number of workers defaults to ``2 * CPUs + 1`` capped by how many workers of
+``GUNICORN_WORKER_MEMORY`` MiB fit into available memory. CPUs and memory are
+read from cgroup (v1 or v2) limits when running in a container.
+
+Every worker hashes passwords in its own pool of ``BCRYPT_EXECUTOR_WORKERS``
+processes, so up to ``workers * BCRYPT_EXECUTOR_WORKERS`` hashes run at once.
+
+Every worker keeps its own pool of ``DATABASE_POOL_SIZE`` connections, one
+per thread by default, plus up to ``DATABASE_MAX_OVERFLOW`` more, so the
+database has to accept ``workers * (DATABASE_POOL_SIZE + DATABASE_MAX_OVERFLOW)``
+connections, e.g. 17 * 4 = 68 on 8 CPUs, below default ``max_connections`` of
+Postgres (100). Replica takes as many on its own. Gevent workers serve many
+requests on a single thread, set ``DATABASE_POOL_SIZE`` explicitly for them.
+"""
+import glob
+import os
+
+
+def cpu_quota():
+    """Returns CPU quota and period of cgroup v2 or v1, or None if unlimited."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as cpu_max:
+            quota, period = cpu_max.read().split()
+        return None if quota == "max" else (int(quota), int(period))
+    except (OSError, ValueError):
+        pass
+
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as cfs_quota:
+            quota = int(cfs_quota.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as cfs_period:
+            period = int(cfs_period.read())
+    except (OSError, ValueError):
+        return None
+    # -1 means no quota
+    return None if quota <= 0 else (quota, period)
+
+
+def cpu_count():
+    """Returns number of CPUs the process may use, honoring cgroup quota."""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+
+    quota = cpu_quota()
+    if quota is None:
+        return count
+    return max(1, min(count, quota[0] // quota[1]))
+
+
+def memory_limit():
+    """Returns memory available to the process in bytes."""
+    physical = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    for path in (
+        "/sys/fs/cgroup/memory.max",
+        "/sys/fs/cgroup/memory/memory.limit_in_bytes",
+    ):
+        try:
+            with open(path) as limit:
+                return min(physical, int(limit.read()))
+        except (OSError, ValueError):
+            continue
+    return physical
+
+
+def worker_count(cpus, memory, worker_memory):
+    by_memory = memory // (worker_memory * 1024 * 1024)
+    return max(1, min(2 * cpus + 1, by_memory))
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(
+    os.getenv(
+        "GUNICORN_WORKERS",
+        worker_count(
+            cpu_count(), memory_limit(), int(os.getenv("GUNICORN_WORKER_MEMORY", 256))
+        ),
+    )
+)
+threads = int(os.getenv("GUNICORN_THREADS", 4 if worker_class == "gthread" else 1))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 1000))
+preload_app = os.getenv("GUNICORN_PRELOAD_APP", "1") == "1"
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 100))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+
+
+def on_starting(server):
+    # counters of workers from previous run must not be summed with new ones
+    directory = os.getenv("METRICS_MULTIPROC_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, "metrics_*.json")):
+            os.remove(path)
+
+
+def worker_exit(server, worker):
+    # samples recorded since the last periodic flush would be lost
+    directory = os.getenv("METRICS_MULTIPROC_DIR")
+    if directory:
+        from project import metrics
+
+        with server.app.wsgi().app_context():
+            metrics.flush(directory)
+
+
+def child_exit(server, worker):
+    directory = os.getenv("METRICS_MULTIPROC_DIR")
+    if directory:
+        from project.metrics import mark_process_dead
+
+        mark_process_dead(worker.pid, directory)
+
+
+def pre_fork(server, worker):
+    # connections opened while preloading must not be shared with workers
+    if server.cfg.preload_app:
+        from project import db
+
+        db.dispose_engines(server.app.wsgi())
+
+
+def post_fork(server, worker):
+    if worker_class == "gevent":
+        try:
+            from psycogreen.gevent import patch_psycopg
+        except ImportError:
+            server.log.warning("psycogreen is not installed, queries will block")
+        else:
+            patch_psycopg()
+
+    from project import db
+
+    # pool is empty after pre_fork, inherited connections are dropped anyway
+    # on checkout, see project.database
+    db.dispose_engines(server.app.wsgi())
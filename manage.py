@@ -1,7 +1,13 @@
+import click
 from flask.cli import FlaskGroup
 
 from project import create_app, db
+from project.api.auth.crud import purge_expired_refresh_tokens
+from project.api.users.importer import import_users
 from project.api.users.models import User  # noqa: F401
+from project.api.users.seeding import seed_users
+from project.hashing import MIN_RECOMMENDED_ROUNDS, calibrate_rounds
+from project.migrations import applied_versions, load_migrations, migrate, stamp
 
 app = create_app()
 cli = FlaskGroup(create_app=create_app)
@@ -14,6 +20,7 @@ def recreatedb():
     db.drop_all()
     db.create_all()
     db.session.commit()
+    stamp(db.engine)
 
 
 @cli.command("seed_db")
@@ -25,5 +32,84 @@ def seed_db():
     db.session.commit()
 
 
+@cli.command("seed_scale")
+@click.option("--users", "count", default=100000, help="Number of users to create.")
+@click.option("--seed", default=0, help="Seed of generated users.")
+@click.option("--batch-size", default=10000, help="Users inserted per statement.")
+def seed_scale(count, seed, batch_size):
+    """Creates large number of generated users for benchmarks"""
+
+    seed_users(count, seed, batch_size, echo=click.echo)
+
+
+@cli.command("import_users")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(["csv", "ndjson"]),
+    help="File format, detected by extension by default.",
+)
+def import_users_command(path, file_format):
+    """Imports users with bcrypt hashed passwords from CSV or NDJSON file"""
+
+    if db.engine.dialect.name != "postgresql":
+        raise click.ClickException("Import requires PostgreSQL database")
+    import_users(path, file_format, echo=click.echo)
+
+
+@cli.command("migrate")
+@click.option("--dry-run", is_flag=True, help="Print SQL and locks without running.")
+def migrate_db(dry_run):
+    """Applies pending schema migrations"""
+
+    pending = migrate(db.engine, dry_run=dry_run, echo=click.echo)
+    if not pending:
+        click.echo("Database is up to date")
+
+
+@cli.command("migrations")
+def list_migrations():
+    """Lists schema migrations and whether they are applied"""
+
+    with db.engine.connect() as connection:
+        applied = applied_versions(connection)
+    for migration in load_migrations():
+        status = "applied" if migration.version in applied else "pending"
+        click.echo(f"{migration.version} {migration.name} {status}")
+
+
+@cli.command("purge_refresh_tokens")
+@click.option("--batch-size", default=1000, help="Tokens deleted per transaction.")
+def purge_refresh_tokens(batch_size):
+    """Deletes expired refresh tokens"""
+
+    count = purge_expired_refresh_tokens(batch_size)
+    click.echo(f"Deleted {count} expired refresh tokens")
+
+
+@cli.command("calibrate")
+@click.option("--target-ms", default=250, help="Target p99 of password hashing.")
+@click.option("--samples", default=5, help="Hashes measured per work factor.")
+def calibrate(target_ms, samples):
+    """Recommends BCRYPT_LOG_ROUNDS meeting target login latency on this host
+
+    Work factor lower than ``MIN_RECOMMENDED_ROUNDS`` is never recommended.
+    """
+
+    configured = app.config["BCRYPT_LOG_ROUNDS"]
+    rounds, timings, met = calibrate_rounds(target_ms / 1000, samples)
+    for measured_rounds, p99 in timings:
+        click.echo(f"rounds={measured_rounds:<3} p99={p99 * 1000:.1f}ms")
+    if not met:
+        click.echo(
+            f"Warning: no work factor of at least {MIN_RECOMMENDED_ROUNDS} meets "
+            f"the {target_ms}ms target on this host, add CPU capacity instead of "
+            "lowering it",
+            err=True,
+        )
+    click.echo(f"Recommended BCRYPT_LOG_ROUNDS={rounds} (configured {configured})")
+
+
 if __name__ == "__main__":
     cli()
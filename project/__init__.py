@@ -4,12 +4,23 @@ from flask import Flask
 from flask_admin import Admin
 from flask_bcrypt import Bcrypt
 from flask_cors import CORS
-from flask_sqlalchemy import SQLAlchemy
+
+from project.cache import Cache
+from project.compression import Compress
+from project.database import SQLAlchemy
+from project.hashing import PasswordHasher
+from project.metrics import Metrics
+from project.timing import RequestTiming
 
 db = SQLAlchemy()
 cors = CORS()
 admin = Admin(template_mode="bootstrap3")
 bcrypt = Bcrypt()
+hasher = PasswordHasher()
+cache = Cache()
+timing = RequestTiming()
+metrics = Metrics()
+compress = Compress()
 
 
 def create_app(script_info=None):
@@ -24,15 +35,21 @@ def create_app(script_info=None):
     db.init_app(app)
     cors.init_app(app, resources={r"*": {"origins": "*"}})
     bcrypt.init_app(app)
+    hasher.init_app(app)
+    cache.init_app(app)
+    timing.init_app(app)
+    metrics.init_app(app)
+    compress.init_app(app)
     if os.getenv("FLASK_ENV") == "development":
         admin.init_app(app)
 
     from project.api import api
 
     api.init_app(app)
+    compress.freeze(app, "specs")
 
     @app.shell_context_processor
     def ctx():
-        return {"app": app, "db": db}
+        return {"app": app, "db": db, "cache": cache}
 
     return app
@@ -1,11 +1,17 @@
 from flask_restx import Api
 
 from project.api.auth.views import namespace as auth_namespace
+from project.api.metrics.views import namespace as metrics_namespace
 from project.api.ping.views import namespace as ping_namespace
+from project.api.representations import output_json
 from project.api.users.views import namespace as users_namespace
+from project.hashing import HasherBusy, handle_hasher_busy
 
 api = Api(version="1.0", title="Users API", doc="/doc")
+api.representation("application/json")(output_json)
 
 api.add_namespace(ping_namespace, "/ping")
+api.add_namespace(metrics_namespace, "/metrics")
 api.add_namespace(users_namespace, "/users")
 api.add_namespace(auth_namespace, "/auth")
+api.errorhandler(HasherBusy)(handle_hasher_busy)
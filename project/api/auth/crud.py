@@ -0,0 +1,87 @@
+import datetime
+import uuid
+
+from flask import current_app
+
+from project import db
+from project.api.auth.models import RefreshToken
+from project.api.users.crud import bump_token_version, invalidate_user
+
+
+def create_refresh_token(user_id):
+    """Stores new refresh token of the user and returns its identifier."""
+    expires_in = current_app.config["REFRESH_TOKEN_EXPIRATION"]
+    token = RefreshToken(
+        jti=uuid.uuid4().hex,
+        user_id=user_id,
+        expires_at=datetime.datetime.utcnow() + datetime.timedelta(seconds=expires_in),
+    )
+
+    db.session.add(token)
+    db.session.commit()
+
+    return token.jti
+
+
+def use_refresh_token(jti):
+    """Revokes refresh token so it can be exchanged only once.
+
+    Presenting already used token means it has leaked, so all refresh tokens
+    of its owner are revoked in that case.
+
+    Returns:
+        user_id (int): owner of the token or None if token is unknown or
+            was already used.
+    """
+    token = db.session.query(RefreshToken).get(jti)
+    if not token:
+        return None
+
+    user_id = token.user_id
+    updated = RefreshToken.query.filter_by(jti=jti, revoked=False).update(
+        {"revoked": True}, synchronize_session=False
+    )
+    db.session.commit()
+
+    if not updated:
+        revoke_user_refresh_tokens(user_id)
+        return None
+
+    return user_id
+
+
+def revoke_user_refresh_tokens(user_id):
+    """Revokes all refresh tokens and makes access token claims of the user stale."""
+    RefreshToken.query.filter_by(user_id=user_id, revoked=False).update(
+        {"revoked": True}, synchronize_session=False
+    )
+    bump_token_version(user_id)
+    db.session.commit()
+    invalidate_user(user_id)
+
+
+def purge_expired_refresh_tokens(batch_size):
+    """Deletes expired refresh tokens in batches of ``batch_size`` rows.
+
+    Returns:
+        count (int): number of deleted tokens.
+    """
+    count = 0
+    now = datetime.datetime.utcnow()
+    while True:
+        jtis = [
+            jti
+            for jti, in db.session.query(RefreshToken.jti)
+            .filter(RefreshToken.expires_at < now)
+            .limit(batch_size)
+        ]
+        if not jtis:
+            break
+
+        RefreshToken.query.filter(RefreshToken.jti.in_(jtis)).delete(
+            synchronize_session=False
+        )
+        db.session.commit()
+        count += len(jtis)
+
+    return count
@@ -0,0 +1,19 @@
+from project import db
+
+
+class RefreshToken(db.Model):
+    """Issued refresh token"""
+
+    __tablename__ = "refresh_tokens"
+    jti = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked = db.Column(db.Boolean(), default=False, nullable=False)
+
+    def __repr__(self):
+        return f"RefreshToken {self.jti} {self.user_id}"
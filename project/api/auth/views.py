@@ -1,8 +1,17 @@
 import jwt
-from flask import request
+from flask import current_app, request
 from flask_restx import Namespace, Resource, fields
 
-from project.api.users.crud import add_user, get_user_by_email, get_user_by_id
+from project import hasher
+from project.api.auth.crud import create_refresh_token, use_refresh_token
+from project.api.serializers import serialize_with
+from project.api.users.crud import (
+    add_user,
+    get_user_by_email,
+    get_user_by_id,
+    is_token_version_stale,
+    rehash_password,
+)
 from project.api.users.models import User
 
 namespace = Namespace("auth")
@@ -31,8 +40,23 @@ status_parser = namespace.parser()
 status_parser.add_argument("Authorization", location="headers")
 
 
+def create_tokens(user):
+    """Returns new access and refresh tokens of the user.
+
+    Access token carries user claims if ``ACCESS_TOKEN_CLAIMS`` is set, so it
+    can be verified without database lookup. Refresh token is stored, so it
+    can be exchanged only once.
+    """
+    claims = user.token_claims() if current_app.config["ACCESS_TOKEN_CLAIMS"] else None
+    jti = create_refresh_token(user.id)
+    return {
+        "access_token": User.encode_token(user.id, "access", claims).decode(),
+        "refresh_token": User.encode_token(user.id, "refresh", jti=jti).decode(),
+    }
+
+
 class Register(Resource):
-    @namespace.marshal_with(user_result)
+    @serialize_with(namespace, user_result)
     @namespace.expect(user_payload, validate=True)
     @namespace.response(201, "Success")
     @namespace.response(400, "User with given email already exists")
@@ -43,16 +67,15 @@ class Register(Resource):
         email = payload.get("email")
         password = payload.get("password")
 
-        user = get_user_by_email(email)
-        if user:
-            namespace.abort(400, f"User with email {email} already exists")
         user = add_user(username, email, password)
+        if not user:
+            namespace.abort(400, f"User with email {email} already exists")
 
         return user, 201
 
 
 class Login(Resource):
-    @namespace.marshal_with(tokens)
+    @serialize_with(namespace, tokens)
     @namespace.expect(login)
     @namespace.response(200, "Success")
     @namespace.response(401, "User with given email or password does not exists")
@@ -63,39 +86,40 @@ class Login(Resource):
         email = payload.get("email")
         password = payload.get("password")
 
-        user = get_user_by_email(email)
+        user = get_user_by_email(email, with_password=True)
+        if not user:
+            hasher.check_dummy_password(password)
         if not user or not user.check_password(password):
             namespace.abort(
                 401, f"User with given email {email} or password does not exists"
             )
+        if user.needs_rehash():
+            rehash_password(user, password)
 
-        access_token = User.encode_token(user.id, "access").decode()
-        refresh_token = User.encode_token(user.id, "refresh").decode()
-
-        return {"access_token": access_token, "refresh_token": refresh_token}, 200
+        return create_tokens(user), 200
 
 
 class Refresh(Resource):
-    @namespace.marshal_with(tokens)
+    @serialize_with(namespace, tokens)
     @namespace.expect(refresh, validate=True)
     @namespace.response(200, "Success")
     @namespace.response(401, "Invalid token")
     def post(self):
-        """Creates new Access and Refresh tokens."""
+        """Exchanges refresh token for new Access and Refresh tokens."""
         payload = request.get_json()
         refresh_token = payload.get("refresh_token")
 
         try:
-            user_id = User.decode_token(refresh_token)
+            jti = User.decode_token_payload(refresh_token).get("jti")
+            user_id = use_refresh_token(jti) if jti else None
+            if not user_id:
+                namespace.abort(401, "Invalid token")
 
             user = get_user_by_id(user_id)
             if not user:
                 namespace.abort(401, "Invalid token")
 
-            access_token = User.encode_token(user.id, "access").decode()
-            refresh_token = User.encode_token(user.id, "refresh").decode()
-
-            return {"access_token": access_token, "refresh_token": refresh_token}, 200
+            return create_tokens(user), 200
         except jwt.ExpiredSignature:
             namespace.abort(401, "Token expired")
         except jwt.InvalidTokenError:
@@ -103,17 +127,35 @@ class Refresh(Resource):
 
 
 class Status(Resource):
-    @namespace.marshal_with(user_result)
+    @serialize_with(namespace, user_result)
     @namespace.response(200, "Success")
     @namespace.response(401, "Invalid Token")
     @namespace.expect(status_parser)
     def get(self):
+        """Returns user owning the access token.
+
+        User is read from claims embedded in the token unless
+        ``AUTH_STATUS_VERIFY_DB`` is set or claims are missing. Token version of
+        the claims is checked against the current one, read from the cache,
+        see :func:`project.api.users.crud.token_version_ttl`, or from the
+        primary database if ``AUTH_STATUS_VERIFY_DB`` is set.
+        """
         auth_header = request.headers.get("Authorization") or ""
         if auth_header:
             try:
                 access_token = auth_header.split(" ")[1]
-                user_id = User.decode_token(access_token)
-                user = get_user_by_id(user_id)
+                payload = User.decode_token_payload(access_token)
+                claims = payload.get("user") or {}
+                verify_db = current_app.config["AUTH_STATUS_VERIFY_DB"]
+                if "ver" in claims:
+                    if is_token_version_stale(
+                        payload["sub"], claims["ver"], cached=not verify_db
+                    ):
+                        namespace.abort(401, "Invalid token")
+                    if not verify_db:
+                        return claims, 200
+
+                user = get_user_by_id(payload["sub"])
                 if not user:
                     namespace.abort(401, "Invalid token")
 
@@ -0,0 +1,53 @@
+import datetime
+import hashlib
+
+from flask import Response, current_app, request
+from werkzeug.http import http_date, quote_etag
+
+
+def _utc(value):
+    # naive timestamps of the database and of werkzeug are in UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=datetime.timezone.utc)
+    return value.astimezone(datetime.timezone.utc)
+
+
+def make_etag(*parts):
+    """Returns strong entity tag derived from given values.
+
+    Fields mask sent by the client is mixed in, as it changes the body.
+    """
+    mask = request.headers.get(current_app.config["RESTX_MASK_HEADER"])
+    return hashlib.sha1(repr((*parts, mask)).encode()).hexdigest()
+
+
+def validators(etag, last_modified=None):
+    """Returns ``ETag``, ``Last-Modified`` and ``Vary`` headers.
+
+    ``Vary`` tells caches that bodies differ by fields mask.
+    """
+    headers = {
+        "ETag": quote_etag(etag),
+        "Vary": current_app.config["RESTX_MASK_HEADER"],
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(_utc(last_modified))
+    return headers
+
+
+def is_not_modified(etag, last_modified=None):
+    """Tests whether client's copy matches the current one.
+
+    ``If-Modified-Since`` is ignored when ``If-None-Match`` is sent. Tags are
+    compared weakly, as compressed responses carry weak tags.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        last_modified = _utc(last_modified).replace(microsecond=0)
+        return last_modified <= _utc(request.if_modified_since)
+    return False
+
+
+def not_modified(headers):
+    return Response(status=304, headers=headers)
@@ -0,0 +1,74 @@
+from flask import Response, current_app
+from flask_restx import Namespace, Resource
+
+from project import cache, db, hasher, metrics
+from project.database import engine_options
+
+namespace = Namespace("metrics")
+
+
+@metrics.gauge("db_engine_info", "Pool and timeout options of database engine.")
+def db_engine_info():
+    options = engine_options(current_app.config, db.engine.url)
+    options.update(options.pop("connect_args", {}), driver=db.engine.url.drivername)
+    labels = tuple(sorted((name, str(value)) for name, value in options.items()))
+    return {labels: 1}
+
+
+@metrics.gauge("db_pool_size", "Number of connections kept in the pool.")
+def db_pool_size():
+    size = getattr(db.engine.pool, "size", None)
+    return size() if size is not None else None
+
+
+@metrics.gauge("db_pool_checked_out", "Number of connections in use.")
+def db_pool_checked_out():
+    checkedout = getattr(db.engine.pool, "checkedout", None)
+    return checkedout() if checkedout is not None else None
+
+
+@metrics.gauge("db_pool_overflow", "Number of connections opened over pool size.")
+def db_pool_overflow():
+    overflow = getattr(db.engine.pool, "overflow", None)
+    return max(overflow(), 0) if overflow is not None else None
+
+
+@metrics.gauge("bcrypt_queue_depth", "Number of passwords waiting to be hashed.")
+def bcrypt_queue_depth():
+    return hasher.pending
+
+
+@metrics.counter("cache_hits", "Number of cache lookups which found an entry.")
+def cache_hits():
+    return cache.stats().get("hits", 0)
+
+
+@metrics.counter("cache_lookups", "Number of cache lookups.")
+def cache_lookups():
+    stats = cache.stats()
+    return stats.get("hits", 0) + stats.get("misses", 0)
+
+
+metrics.ratio(
+    "cache_hit_ratio",
+    "Share of cache lookups which found an entry.",
+    "cache_hits",
+    "cache_lookups",
+)
+
+
+class Metrics(Resource):
+    """Represents metrics of all application processes"""
+
+    @namespace.produces(["text/plain"])
+    def get(self):
+        """GET /metrics endpoint
+
+        Returns:
+            metrics in Prometheus text exposition format
+
+        """
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+namespace.add_resource(Metrics, "")
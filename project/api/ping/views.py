@@ -1,8 +1,129 @@
+import functools
+import logging
+import math
+import threading
+import time
+
+from flask import current_app
 from flask_restx import Namespace, Resource
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from project import db
+
+logger = logging.getLogger(__name__)
 
 namespace = Namespace("ping")
 
 
+class CheckFailed(Exception):
+    """Raised by checks with message which can be shown to any caller."""
+
+
+@functools.lru_cache(maxsize=None)
+def probe_engine(engine, timeout):
+    """Returns engine opening new connection to the database of given engine.
+
+    Probes never wait for the pool of the application, exhausted pool is
+    reported by :func:`check_pool` instead. Connecting and the query are
+    limited by ``timeout`` seconds on Postgres.
+    """
+    connect_args = {}
+    if engine.dialect.name == "postgresql":
+        connect_args = {
+            "connect_timeout": max(1, math.ceil(timeout)),
+            "options": f"-c statement_timeout={int(timeout * 1000)}",
+        }
+    return create_engine(engine.url, poolclass=NullPool, connect_args=connect_args)
+
+
+def check_database():
+    """Runs trivial query on a new connection outside of the pool."""
+    timeout = current_app.config["READINESS_DATABASE_TIMEOUT"]
+    with probe_engine(db.engine, timeout).connect() as connection:
+        connection.execute(text("SELECT 1"))
+    return {}
+
+
+def check_pool():
+    """Verifies pool can still hand out connections without waiting."""
+    pool = db.engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {}
+
+    checked_out = pool.checkedout()
+    max_overflow = getattr(pool, "_max_overflow", 0)
+    details = {"checked_out": checked_out}
+    if max_overflow >= 0:
+        headroom = pool.size() + max_overflow - checked_out
+        details["headroom"] = headroom
+        if headroom < current_app.config["READINESS_MIN_POOL_HEADROOM"]:
+            raise CheckFailed("Connection pool is exhausted")
+    return details
+
+
+class Readiness:
+    """Runs dependency checks, reusing result for ``READINESS_CACHE_TTL``.
+
+    Checks run outside of the lock and probes arriving while they run get the
+    previous result, so a slow dependency never makes probes queue up. Only
+    messages of :class:`CheckFailed` are returned, other errors are logged.
+    """
+
+    checks = {"database": check_database, "pool": check_pool}
+
+    def __init__(self):
+        self._result = None
+        self._expires_at = 0
+        self._running = False
+        self._lock = threading.Lock()
+
+    def run(self):
+        checks = {}
+        for name, check in self.checks.items():
+            started = time.perf_counter()
+            try:
+                result = {"status": "success", **check()}
+            except CheckFailed as error:
+                result = {"status": "fail", "message": str(error)}
+            except Exception:
+                logger.exception("readiness check %s failed", name)
+                result = {"status": "fail", "message": f"{name} check failed"}
+            result["latency_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            checks[name] = result
+
+        failed = any(check["status"] == "fail" for check in checks.values())
+        status = "fail" if failed else "success"
+        return {"status": status, "checks": checks}, 503 if failed else 200
+
+    def check(self):
+        with self._lock:
+            if self._result is not None and (
+                self._running or time.monotonic() < self._expires_at
+            ):
+                return self._result
+            self._running = True
+
+        try:
+            result = self.run()
+        finally:
+            with self._lock:
+                self._running = False
+
+        with self._lock:
+            self._result = result
+            ttl = current_app.config["READINESS_CACHE_TTL"]
+            self._expires_at = time.monotonic() + ttl
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._result = None
+
+
+readiness = Readiness()
+
+
 class Ping(Resource):
     """Represents health check"""
 
@@ -16,4 +137,33 @@ class Ping(Resource):
         return {"status": "success", "message": "pong!"}
 
 
+class Live(Resource):
+    """Represents liveness check"""
+
+    def get(self):
+        """GET /ping/live endpoint
+
+        Returns:
+            dict object telling the process is able to serve requests
+
+        """
+        return {"status": "success", "message": "alive"}
+
+
+class Ready(Resource):
+    """Represents readiness check"""
+
+    def get(self):
+        """GET /ping/ready endpoint
+
+        Returns:
+            dict object with status and latency of every dependency check,
+            503 status code if any of them failed
+
+        """
+        return readiness.check()
+
+
 namespace.add_resource(Ping, "")
+namespace.add_resource(Live, "/live")
+namespace.add_resource(Ready, "/ready")
@@ -0,0 +1,55 @@
+import datetime
+import json
+
+from flask import current_app, make_response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def use_orjson():
+    """Tells whether responses are encoded with orjson.
+
+    ``JSON_BACKEND`` set to ``auto`` uses orjson if it is installed, ``orjson``
+    requires it and ``stdlib`` always uses :mod:`json`.
+    """
+    backend = current_app.config["JSON_BACKEND"]
+    if backend == "orjson" and orjson is None:
+        raise RuntimeError("JSON_BACKEND is orjson, but orjson is not installed")
+    return backend != "stdlib" and orjson is not None
+
+
+def dumps(data):
+    """Returns data encoded as JSON bytes, datetimes in ISO 8601 format.
+
+    Formatting options in ``RESTX_JSON`` or indentation in debug mode are
+    supported only by :mod:`json`, so it is used whenever they are set.
+    """
+    settings = dict(current_app.config.get("RESTX_JSON") or {})
+    if current_app.debug:
+        settings.setdefault("indent", 4)
+
+    if not settings and use_orjson():
+        try:
+            return orjson.dumps(data, default=_default)
+        except TypeError:
+            # e.g. dict with non-string keys, which json converts
+            pass
+
+    settings.setdefault("default", _default)
+    return json.dumps(data, **settings).encode()
+
+
+def output_json(data, code, headers=None):
+    """Makes a Flask response with a JSON encoded body"""
+    response = make_response(dumps(data) + b"\n", code)
+    response.headers.extend(headers or {})
+    return response
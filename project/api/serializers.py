@@ -0,0 +1,164 @@
+import datetime
+from functools import wraps
+
+from flask import current_app, request
+from flask_restx import fields, marshal
+from flask_restx.utils import unpack
+from sqlalchemy.engine import RowProxy
+from werkzeug.wrappers import BaseResponse
+
+# fields whose output() is the plain Raw one, so value can be formatted
+# without calling it
+SIMPLE_FIELDS = (
+    fields.String,
+    fields.Integer,
+    fields.Float,
+    fields.Arbitrary,
+    fields.Fixed,
+    fields.Boolean,
+    fields.DateTime,
+    fields.Date,
+)
+
+
+def _format_datetime(field):
+    if field.dt_format != "iso8601":
+        return field.format
+
+    def format_datetime(value):
+        if value.__class__ is datetime.datetime:
+            return value.isoformat()
+        return field.format(value)
+
+    return format_datetime
+
+
+def _formatter(field):
+    """Returns expression formatting not None value and helper it needs."""
+    if type(field) is fields.String:
+        return "str({value})", None
+    if type(field) is fields.Integer:
+        return "int({value})", None
+    if type(field) is fields.DateTime:
+        return "{helper}({value})", _format_datetime(field)
+    return "{helper}({value})", field.format
+
+
+def _accessor(mode, key):
+    if mode == "attr":
+        return f"getattr(obj, {key!r}, None)"
+    if mode == "get":
+        return f"obj.get({key!r})"
+    return f"obj[{key!r}]"
+
+
+def compile_model(model, mode):
+    """Compiles model into function serializing single object.
+
+    Generated function reads every field once and formats it like the field
+    would, without walking the model and calling ``output`` of every field.
+
+    Args:
+        model (Model): flask-restx model with simple fields only.
+        mode (str): how values are read, ``attr`` from attributes of objects,
+            ``get`` from dicts, ``item`` by key from Core rows.
+
+    Raises:
+        TypeError: if model has fields which can't be compiled.
+    """
+    namespace = {}
+    lines = ["def serialize(obj):"]
+    items = []
+    for index, (key, field) in enumerate(model.resolved.items()):
+        field = fields.Raw() if field is None else field
+        if isinstance(field, type):
+            field = field()
+        if (
+            not isinstance(field, SIMPLE_FIELDS)
+            or field.mask
+            or callable(field.default)
+        ):
+            raise TypeError(f"Field {key} of {model.name} can't be compiled")
+
+        attribute = field.attribute if field.attribute is not None else key
+        if not isinstance(attribute, str) or "." in attribute:
+            raise TypeError(f"Field {key} of {model.name} can't be compiled")
+
+        expression, helper = _formatter(field)
+        namespace[f"format_{index}"] = helper
+        namespace[f"default_{index}"] = (
+            field.format(field.default) if field.default else field.default
+        )
+        value = f"value_{index}"
+        lines.append(f"    {value} = {_accessor(mode, attribute)}")
+        formatted = expression.format(helper=f"format_{index}", value=value)
+        items.append(f"{key!r}: default_{index} if {value} is None else {formatted}")
+    lines.append(f"    return {{{', '.join(items)}}}")
+
+    exec("\n".join(lines), namespace)
+    return namespace["serialize"]
+
+
+class Serializer:
+    """Serializes objects, dicts or Core rows with compiled model.
+
+    Output is the same as of ``marshal`` without mask.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.from_object = compile_model(model, "attr")
+        self.from_dict = compile_model(model, "get")
+        self.from_row = compile_model(model, "item")
+
+    def serialize_one(self, obj):
+        if isinstance(obj, dict):
+            return self.from_dict(obj)
+        if isinstance(obj, RowProxy):
+            return self.from_row(obj)
+        return self.from_object(obj)
+
+    def __call__(self, data):
+        if isinstance(data, (list, tuple)):
+            if not data:
+                return []
+            serialize = self.serialize_one
+            if isinstance(data[0], dict):
+                serialize = self.from_dict
+            elif isinstance(data[0], RowProxy):
+                serialize = self.from_row
+            return [serialize(obj) for obj in data]
+        return self.serialize_one(data)
+
+
+def serialize_with(namespace, model, as_list=False, **kwargs):
+    """Drop-in replacement of ``namespace.marshal_with`` using :class:`Serializer`.
+
+    Documentation is generated by ``marshal_with`` itself, so Swagger
+    specification stays the same. Requests with fields mask header are still
+    marshalled by flask-restx. Responses returned by resource, like 304 Not
+    Modified, are passed through.
+    """
+
+    def wrapper(func):
+        documented = namespace.marshal_with(model, as_list=as_list, **kwargs)(func)
+        serializer = Serializer(model)
+
+        @wraps(func)
+        def serialize(*args, **kw):
+            resp = func(*args, **kw)
+            if isinstance(resp, BaseResponse):
+                return resp
+
+            data, code, headers = unpack(resp)
+            mask = request.headers.get(current_app.config["RESTX_MASK_HEADER"])
+            if mask:
+                data = marshal(data, model, mask=mask, ordered=namespace.ordered)
+            else:
+                data = serializer(data)
+            return data, code, headers
+
+        serialize.__apidoc__ = documented.__apidoc__
+        return serialize
+
+    return wrapper
@@ -1,6 +1,7 @@
 from flask_admin.contrib.sqla import ModelView
 
-from project import bcrypt
+from project import hasher
+from project.api.users import crud
 
 
 class UsersAdminView(ModelView):
@@ -26,4 +27,18 @@ class UsersAdminView(ModelView):
     column_default_sort = ("created_date", True)
 
     def on_model_change(self, form, model, is_created):
-        model.password = bcrypt.generate_password_hash(model.password).decode()
+        model.email = model.normalize_email(model.email)
+        model.password = hasher.generate_password_hash(model.password)
+        if not is_created:
+            model.touch()
+            # deactivated or changed user must not keep using issued tokens
+            crud.bump_token_version(model.id)
+
+    def on_model_delete(self, model):
+        crud.remember_token_version(model.id, crud.DELETED_TOKEN_VERSION)
+
+    def after_model_change(self, form, model, is_created):
+        crud.invalidate_user(model.id)
+
+    def after_model_delete(self, model):
+        crud.invalidate_user(model.id)
@@ -1,37 +1,389 @@
-from project import db
+import base64
+import datetime
+import json
+
+from flask import current_app
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import make_transient_to_detached, undefer
+
+from project import cache, db, hasher
 from project.api.users.models import User
 
+# password is deliberately never cached, nor is token version, which would
+# outlive bumps done by other processes, see get_token_version
+CACHED_COLUMNS = (
+    "id",
+    "username",
+    "email",
+    "active",
+    "created_date",
+    "version",
+    "updated_date",
+)
+
+# unique index enforcing case-insensitive uniqueness of emails
+EMAIL_INDEX = "ix_users_email_lower"
+
+# columns of users returned as Core rows by list reads
+LIST_COLUMNS = (User.id, User.username, User.email, User.created_date)
+
+# columns of users summarized by page state
+STATE_COLUMNS = (User.id, User.version, User.updated_date)
+
+
+def encode_cursor(created_date, user_id):
+    """Encodes position of the last seen user into opaque cursor token."""
+    raw = json.dumps([created_date.isoformat(), user_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decodes cursor token created by :func:`encode_cursor`.
+
+    Raises:
+        ValueError: if cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_date, user_id = json.loads(raw)
+        return datetime.datetime.fromisoformat(created_date), int(user_id)
+    except (TypeError, ValueError) as error:
+        raise ValueError(f"Invalid cursor {cursor}") from error
+
+
+def _users_page_statement(columns, limit, cursor):
+    statement = select(columns).order_by(User.created_date, User.id)
+    if cursor:
+        created_date, user_id = decode_cursor(cursor)
+        statement = statement.where(
+            or_(
+                User.created_date > created_date,
+                and_(User.created_date == created_date, User.id > user_id),
+            )
+        )
+    return statement.limit(limit)
+
+
+def _page_state(users):
+    updated_dates = [user.updated_date for user in users if user.updated_date]
+    return (
+        len(users),
+        sum(user.id for user in users) if users else None,
+        sum(user.version for user in users) if users else None,
+        max(updated_dates, default=None),
+    )
+
+
+def get_users_page(limit, cursor=None):
+    """Returns a page of users ordered by creation date.
+
+    Uses keyset condition on ``(created_date, id)`` so fetching any page costs
+    an index range scan instead of OFFSET scan over all preceding rows.
+
+    Args:
+        limit (int): maximum number of users in the page.
+        cursor (str): token returned with the previous page.
+
+    Returns:
+        tuple: list of Core rows with ``LIST_COLUMNS`` of users, cursor of
+            the next page or None if there are no more users and state of
+            the page equal to one returned by :func:`get_users_page_state`.
+    """
+    columns = LIST_COLUMNS + STATE_COLUMNS[1:]
+    statement = _users_page_statement(columns, limit + 1, cursor)
+    with db.replica():
+        users = db.session.execute(statement).fetchall()
+
+    state = _page_state(users)
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1].created_date, users[-1].id)
+
+    return users, next_cursor, state
+
+
+def get_users_page_state(limit, cursor=None):
+    """Summarizes users of the page returned by :func:`get_users_page`.
+
+    Summary changes whenever user is added to, removed from or changed within
+    the page, and is computed by aggregate query without fetching the users.
+
+    Returns:
+        tuple: number of users, sum of their ids and versions and the last
+            update time.
+    """
+    page = _users_page_statement(STATE_COLUMNS, limit + 1, cursor).alias("page")
+    statement = select(
+        [
+            func.count(),
+            func.sum(page.c.id),
+            func.sum(page.c.version),
+            func.max(page.c.updated_date),
+        ]
+    )
+    with db.replica():
+        return tuple(db.session.execute(statement).first())
+
+
+def iter_users(batch_size):
+    """Returns iterable over Core rows with ``LIST_COLUMNS`` of all users.
+
+    Rows are fetched through server-side cursor in batches of ``batch_size``,
+    so memory usage does not depend on the number of users.
+    """
+    statement = (
+        select(LIST_COLUMNS).order_by(User.id).execution_options(stream_results=True)
+    )
+    with db.replica():
+        result = db.session.execute(statement)
+        rows = result.fetchmany(batch_size)
+        while rows:
+            yield from rows
+            rows = result.fetchmany(batch_size)
+
+
+def user_cache_key(user_id):
+    return f"user:{user_id}"
+
+
+def invalidate_user(user_id):
+    """Removes user from the cache after it was changed or deleted."""
+    cache.delete(user_cache_key(user_id))
+
+
+def token_version_key(user_id):
+    return f"token_version:{user_id}"
+
+
+# cached in place of token version of deleted user, tokens never carry it
+DELETED_TOKEN_VERSION = -1
 
-def get_all_users():
-    return User.query.all()
+
+def token_version_ttl():
+    """Returns how long token versions are cached, zero if they are not.
+
+    Cache shared by all processes sees every bump, so versions live there as
+    long as access tokens do. Cache of a single process misses bumps done by
+    other processes, so versions live there only ``TOKEN_VERSION_LOCAL_TTL``
+    seconds, which bounds how long they may accept revoked token.
+    """
+    if cache.shared:
+        return current_app.config["ACCESS_TOKEN_EXPIRATION"]
+    return current_app.config["TOKEN_VERSION_LOCAL_TTL"]
+
+
+def remember_token_version(user_id, token_version):
+    """Caches current token version of the user, see :func:`token_version_ttl`."""
+    ttl = token_version_ttl()
+    if ttl:
+        cache.set(token_version_key(user_id), token_version, ttl)
+
+
+def get_token_version(user_id, cached=True):
+    """Returns current token version of the user or None if user does not exist.
+
+    Version is read from the cache unless ``cached`` is false, and otherwise
+    from the primary database, as replica may not have seen the last bump yet.
+    """
+    key = token_version_key(user_id)
+    ttl = token_version_ttl()
+    if cached and ttl:
+        token_version = cache.get(key)
+        if token_version is not None:
+            return None if token_version == DELETED_TOKEN_VERSION else token_version
+
+    token_version = db.session.query(User.token_version).filter_by(id=user_id).scalar()
+    if token_version is not None and ttl:
+        # version bumped meanwhile by other process is not replaced
+        cache.add(key, token_version, ttl)
+    return token_version
+
+
+def is_token_version_stale(user_id, token_version, cached=True):
+    """Tests token version embedded in access token against the current one.
+
+    Tokens of deleted users are stale.
+    """
+    return get_token_version(user_id, cached) != token_version
+
+
+def bump_token_version(user_id):
+    """Makes access token claims of the user issued so far stale.
+
+    Version is incremented on the current row by the database, so concurrent
+    bumps are never lost, and shared while the row is locked by the update,
+    so that version read before it can't replace it in the cache. Session has
+    to be committed by the caller.
+    """
+    User.query.filter_by(id=user_id).update(
+        {"token_version": User.token_version + 1}, synchronize_session=False
+    )
+    token_version = db.session.query(User.token_version).filter_by(id=user_id).scalar()
+    if token_version is not None:
+        remember_token_version(user_id, token_version)
 
 
 def get_user_by_id(user_id):
-    return User.query.filter_by(id=user_id).first()
+    """Returns user by id using cache if it is enabled.
+
+    Cached user is attached to the session without querying database. Cache
+    is filled from the primary only, as replica may still hold the row
+    replaced by the last write, and it is skipped by clients which have to
+    read from the primary after writing, see
+    :class:`project.database.SQLAlchemy`.
+    """
+    if not cache.enabled or db.session.info.get("primary"):
+        with db.replica():
+            return User.query.filter_by(id=user_id).first()
+
+    key = user_cache_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        user = User.query.filter_by(id=user_id).first()
+        if user:
+            cache.set(key, {column: getattr(user, column) for column in CACHED_COLUMNS})
+        return user
+
+    user = User.__mapper__.class_manager.new_instance()
+    for column, value in state.items():
+        setattr(user, column, value)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
 
+def get_user_by_email(email, with_password=False):
+    """Returns user by email.
 
-def get_user_by_email(email):
-    return User.query.filter_by(email=email).first()
+    Password hash is deferred, unless ``with_password`` is set it is loaded
+    by another query when password is checked.
+    """
+    query = User.query.filter(func.lower(User.email) == User.normalize_email(email))
+    if with_password:
+        query = query.options(undefer(User.password))
+    with db.replica():
+        return query.first()
+
+
+def is_email_taken(error):
+    """Tests whether IntegrityError was raised by unique index of emails."""
+    diag = getattr(error.orig, "diag", None)
+    if diag is not None:
+        return diag.constraint_name == EMAIL_INDEX
+    # sqlite reports only the message
+    return f"index '{EMAIL_INDEX}'" in str(error.orig)
 
 
 def add_user(username, email, password):
+    """Creates new user.
+
+    Uniqueness of email is enforced by database index, so no lookup is done
+    before insert.
+
+    Returns:
+        user (User): created user or None if email is already taken.
+    """
     user = User(username=username, email=email, password=password)
 
     db.session.add(user)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError as error:
+        db.session.rollback()
+        if not is_email_taken(error):
+            raise
+        return None
 
     return user
 
 
+def bulk_add_users(rows, chunk_size):
+    """Inserts many users with multi-row INSERT statements.
+
+    Users whose email is already taken are skipped, as with
+    ``ON CONFLICT DO NOTHING``.
+
+    Args:
+        rows (list): dicts with username, normalized email and password hash.
+        chunk_size (int): number of users inserted by single statement.
+
+    Returns:
+        created (set): emails of inserted users.
+    """
+    table = User.__table__
+    created = set()
+    for start in range(0, len(rows), chunk_size):
+        end = start + chunk_size
+        chunk = rows[start:end]
+        if db.engine.dialect.name == "postgresql":
+            statement = (
+                postgresql.insert(table)
+                .values(chunk)
+                .on_conflict_do_nothing()
+                .returning(table.c.email)
+            )
+            created.update(email for email, in db.session.execute(statement))
+        else:
+            emails = [row["email"] for row in chunk]
+            taken = {
+                email
+                for email, in db.session.query(User.email).filter(
+                    func.lower(User.email).in_(emails)
+                )
+            }
+            chunk = [row for row in chunk if row["email"] not in taken]
+            if chunk:
+                db.session.execute(table.insert().values(chunk))
+            created.update(row["email"] for row in chunk)
+        db.session.commit()
+
+    return created
+
+
+def rehash_password(user, password):
+    """Replaces password hash of the user with one of current work factor.
+
+    Args:
+        user (User): user whose password was just checked.
+        password (str): the checked password.
+    """
+    user.password = hasher.generate_password_hash(password)
+    db.session.commit()
+
+
 def update_user(user, username, email):
-    """Updates User object"""
+    """Updates User object and makes claims in issued access tokens stale.
+
+    Returns:
+        user (User): updated user or None if email is taken by another user.
+    """
+    user_id = user.id
     user.username = username
-    user.email = email
-    db.session.commit()
+    user.email = User.normalize_email(email)
+    user.touch()
+    try:
+        bump_token_version(user_id)
+        db.session.commit()
+    except IntegrityError as error:
+        db.session.rollback()
+        # bumped version may have been shared before the update failed
+        cache.delete(token_version_key(user_id))
+        if not is_email_taken(error):
+            raise
+        return None
+
+    invalidate_user(user_id)
     return user
 
 
 def delete_user(user):
+    """Deletes the user, access tokens issued to it become invalid."""
+    user_id = user.id
     db.session.delete(user)
+    db.session.flush()
+    remember_token_version(user_id, DELETED_TOKEN_VERSION)
     db.session.commit()
+    invalidate_user(user_id)
     return user
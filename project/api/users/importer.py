@@ -0,0 +1,194 @@
+import csv
+import io
+import json
+import time
+
+from project import db
+from project.api.users.models import User
+
+BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+
+CREATE_STAGING_TABLE = """
+CREATE TEMPORARY TABLE users_import (
+    username VARCHAR(128), email VARCHAR(128), password VARCHAR(255)
+) ON COMMIT DROP
+"""
+
+COPY_USERS = "COPY users_import (username, email, password) FROM STDIN WITH CSV"
+
+MERGE_USERS = """
+INSERT INTO users (
+    username, email, password, active, created_date, token_version, version,
+    updated_date
+)
+SELECT DISTINCT ON (email) username, email, password, true,
+    now() AT TIME ZONE 'utc', 0, 1, now() AT TIME ZONE 'utc'
+FROM users_import
+ORDER BY email
+ON CONFLICT DO NOTHING
+"""
+
+
+class CopyStream:
+    """File-like object rendering rows as CSV while COPY reads it.
+
+    Only a single chunk of CSV is kept in memory at once.
+    """
+
+    def __init__(self, rows, on_progress=None, progress_every=100000):
+        self.count = 0
+        self._rows = iter(rows)
+        self._on_progress = on_progress
+        self._progress_every = progress_every
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+
+    def read(self, size=-1):
+        while size < 0 or self._buffer.tell() < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._writer.writerow(row)
+            self.count += 1
+            if self._on_progress and self.count % self._progress_every == 0:
+                self._on_progress(self.count)
+
+        data = self._buffer.getvalue()
+        if size >= 0:
+            data, rest = data[:size], data[size:]
+        else:
+            rest = ""
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._buffer.write(rest)
+        return data
+
+
+def read_records(path, file_format=None):
+    """Yields users read lazily from CSV or newline delimited JSON file.
+
+    CSV file must have header with ``username``, ``email`` and ``password``
+    columns. Format is detected by file extension unless given.
+
+    Yields:
+        tuple: line number and user, None if the line can't be parsed.
+    """
+    file_format = file_format or ("csv" if path.endswith(".csv") else "ndjson")
+    if file_format == "csv":
+        with open(path, newline="") as users_file:
+            reader = csv.DictReader(users_file)
+            while True:
+                try:
+                    record = next(reader)
+                except StopIteration:
+                    return
+                except csv.Error:
+                    record = None
+                yield reader.line_num, record
+    else:
+        with open(path, "rb") as users_file:
+            for line_number, line in enumerate(users_file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line.decode("utf-8"))
+                except ValueError:
+                    record = None
+                yield line_number, record
+
+
+def validate_record(record):
+    """Returns reason why user can't be imported or None if it is valid."""
+    if not isinstance(record, dict):
+        return "malformed line"
+    for name in ("username", "email", "password"):
+        value = record.get(name)
+        if not value or not isinstance(value, str):
+            return f"{name} is missing or not a string"
+        if "\x00" in value:
+            return f"{name} contains NUL character"
+        if len(value) > User.__table__.c[name].type.length:
+            return f"{name} is too long"
+    if not record["password"].startswith(BCRYPT_PREFIXES):
+        return "password is not bcrypt hash"
+    return None
+
+
+def prepare_rows(records, stats, on_reject=None):
+    """Yields ``(username, email, password)`` rows ready for COPY.
+
+    Invalid records, see :func:`validate_record`, are skipped and counted in
+    ``stats["rejected"]``, so a bad line never aborts the import.
+
+    Args:
+        records (iterable): line numbers and users from :func:`read_records`.
+        stats (dict): counters updated as records are read.
+        on_reject (callable): called with line number and reason of every
+            rejected record.
+    """
+    for line_number, record in records:
+        reason = validate_record(record)
+        if reason:
+            stats["rejected"] += 1
+            if on_reject:
+                on_reject(line_number, reason)
+            continue
+        email = User.normalize_email(record["email"])
+        yield record["username"], email, record["password"]
+
+
+def copy_users(rows, on_progress=None):
+    """Loads users with PostgreSQL COPY into staging table and merges them.
+
+    Users whose email is already taken are skipped.
+
+    Args:
+        rows (iterable): ``(username, email, password)`` tuples with bcrypt
+            hashes as passwords.
+        on_progress (callable): called with number of rows copied so far.
+
+    Returns:
+        tuple: number of rows copied and number of users inserted.
+    """
+    stream = CopyStream(rows, on_progress)
+    connection = db.engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL statement_timeout = 0")
+            cursor.execute(CREATE_STAGING_TABLE)
+            cursor.copy_expert(COPY_USERS, stream)
+            cursor.execute(MERGE_USERS)
+            inserted = cursor.rowcount
+        connection.commit()
+    finally:
+        connection.close()
+
+    return stream.count, inserted
+
+
+def import_users(path, file_format=None, echo=print):
+    """Imports users from file reporting progress, throughput and skipped lines.
+
+    Returns:
+        dict: numbers of copied, inserted and rejected rows.
+    """
+    started = time.perf_counter()
+
+    def report(count):
+        rate = count / (time.perf_counter() - started)
+        echo(f"{count} rows copied, {rate:.0f} rows/sec")
+
+    def reject(line_number, reason):
+        echo(f"line {line_number} skipped: {reason}")
+
+    stats = {"rejected": 0}
+    stats["copied"], stats["inserted"] = copy_users(
+        prepare_rows(read_records(path, file_format), stats, reject), report
+    )
+    elapsed = time.perf_counter() - started
+    echo(
+        f"{stats['copied']} rows copied, {stats['inserted']} users inserted, "
+        f"{stats['rejected']} rejected in {elapsed:.1f}s "
+        f"({stats['copied'] / elapsed:.0f} rows/sec)"
+    )
+    return stats
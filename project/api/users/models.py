@@ -5,22 +5,28 @@ import jwt
 from flask import current_app
 from sqlalchemy.sql import func
 
-from project import bcrypt, db
-
-# TODO: invalidate refresh tokens
-# storing single refresh token per user in database (create separate table)
+from project import db, hasher
+from project.database import utcnow
+from project.timing import timed
 
 
 class User(db.Model):
     """User representation"""
 
     __tablename__ = "users"
+    __table_args__ = (db.Index("ix_users_created_date_id", "created_date", "id"),)
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     username = db.Column(db.String(128), nullable=False)
     email = db.Column(db.String(128), nullable=False)
-    password = db.Column(db.String(255), nullable=False)
+    # loaded only when password is checked
+    password = db.deferred(db.Column(db.String(255), nullable=False))
     active = db.Column(db.Boolean(), default=True, nullable=False)
-    created_date = db.Column(db.DateTime, default=func.now(), nullable=False)
+    # naive UTC, as are all timestamps
+    created_date = db.Column(db.DateTime, default=utcnow(), nullable=False)
+    token_version = db.Column(db.Integer, default=0, nullable=False)
+    # bumped whenever fields sent to clients change, validates cached copies
+    version = db.Column(db.Integer, default=1, nullable=False)
+    updated_date = db.Column(db.DateTime, default=utcnow())
 
     def __init__(self, username, email, password=""):
         """Initializes User with username and email
@@ -31,24 +37,59 @@ class User(db.Model):
 
         """
         self.username = username
-        self.email = email
-        self.password = bcrypt.generate_password_hash(password).decode()
+        self.email = User.normalize_email(email)
+        self.password = hasher.generate_password_hash(password)
 
     def __repr__(self):
         return f"User {self.id} {self.email}"
 
+    @staticmethod
+    def normalize_email(email):
+        """Returns email in the form it is stored and looked up by."""
+        return email.strip().lower()
+
     def check_password(self, password):
         """Tests given password agains user's password."""
-        return bcrypt.check_password_hash(self.password, password)
+        return hasher.check_password_hash(self.password, password)
+
+    def needs_rehash(self):
+        """Tests whether password hash should be replaced after successful check.
+
+        Hash created with work factor other than ``BCRYPT_LOG_ROUNDS`` is
+        replaced if ``BCRYPT_REHASH_ON_LOGIN`` is set.
+        """
+        return current_app.config["BCRYPT_REHASH_ON_LOGIN"] and hasher.needs_rehash(
+            self.password
+        )
+
+    def touch(self):
+        """Marks representation of the user as changed.
+
+        Version is incremented by the database, as loaded one may be stale.
+        """
+        self.version = User.version + 1
+        self.updated_date = utcnow()
+
+    def token_claims(self):
+        """Returns claims describing the user which can be embedded in token."""
+        return {
+            "username": self.username,
+            "email": self.email,
+            "active": self.active,
+            "ver": self.token_version,
+        }
 
     @staticmethod
-    def encode_token(user_id, token_type="access"):
+    def encode_token(user_id, token_type="access", claims=None, jti=None):
         """Creates JWT token.
 
         Args:
             user_id (int): user identifier.
             token_type (str): type of the token: "access" or "refresh".
                 Default is "access".
+            claims (dict): optional user claims created by
+                :meth: User.token_claims.
+            jti (str): optional token identifier.
 
         Returns:
             token (bytes): encoded JWT token.
@@ -64,8 +105,13 @@ class User(db.Model):
             "iat": datetime.datetime.utcnow(),
             "sub": user_id,
         }
+        if claims:
+            payload["user"] = claims
+        if jti:
+            payload["jti"] = jti
         secret_key = current_app.config.get("SECRET_KEY")
-        return jwt.encode(payload, secret_key, algorithm="HS256")
+        with timed("token"):
+            return jwt.encode(payload, secret_key, algorithm="HS256")
 
     @staticmethod
     def decode_token(token):
@@ -78,8 +124,25 @@ class User(db.Model):
         Returns:
             user_id (int): user identifier.
         """
-        payload = jwt.decode(token, current_app.config["SECRET_KEY"])
-        return payload["sub"]
+        return User.decode_token_payload(token)["sub"]
+
+    @staticmethod
+    def decode_token_payload(token):
+        """Decodes and verifies token returning all its claims.
+
+        Args:
+            token (Union[str, bytes]): access or refresh token created by
+                :meth: User.encode_token.
+
+        Returns:
+            payload (dict): token claims.
+        """
+        with timed("token"):
+            return jwt.decode(token, current_app.config["SECRET_KEY"])
+
+
+# every login and registration looks user up by email
+db.Index("ix_users_email_lower", func.lower(User.email), unique=True)
 
 
 if os.getenv("FLASK_ENV") == "development":
@@ -0,0 +1,98 @@
+import itertools
+import random
+import time
+
+import bcrypt
+
+from project import db
+from project.api.users.importer import copy_users
+from project.api.users.models import User
+
+# fmt: off
+FIRST_NAMES = (
+    "james", "mary", "john", "patricia", "robert", "jennifer", "michael", "linda",
+    "william", "elizabeth", "david", "barbara", "richard", "susan", "joseph",
+    "jessica", "thomas", "sarah", "charles", "karen", "olga", "ivan", "yuki",
+    "wei", "fatima", "ahmed", "maria", "jose", "anna", "lars",
+)
+LAST_NAMES = (
+    "smith", "johnson", "williams", "brown", "jones", "garcia", "miller", "davis",
+    "rodriguez", "martinez", "hernandez", "lopez", "gonzalez", "wilson", "anderson",
+    "taylor", "moore", "jackson", "martin", "lee", "petrov", "tanaka", "wang",
+    "khan", "silva", "nielsen", "novak", "kowalski", "muller", "rossi",
+)
+# fmt: on
+DOMAINS = ("example.com", "example.org", "example.net", "mail.example.com")
+
+# seeded user number N has password "password{N % SEED_PASSWORDS}"
+SEED_PASSWORDS = 16
+SEED_LOG_ROUNDS = 4
+
+
+def generate_users(count, seed=0):
+    """Yields ``(username, email, password)`` of ``count`` fake users.
+
+    The same seed always gives the same users, emails are unique.
+    """
+    rng = random.Random(seed)
+    for number in range(count):
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        username = f"{first}_{last}{rng.randrange(100)}"
+        email = f"{first}.{last}.{number}@{rng.choice(DOMAINS)}"
+        yield username, email, f"password{number % SEED_PASSWORDS}"
+
+
+def precompute_hashes():
+    """Returns low cost hashes of seed passwords, hashed once per seeding."""
+    return {
+        f"password{number}": bcrypt.hashpw(
+            f"password{number}".encode(), bcrypt.gensalt(SEED_LOG_ROUNDS)
+        ).decode()
+        for number in range(SEED_PASSWORDS)
+    }
+
+
+def seed_users(count, seed=0, batch_size=10000, echo=print):
+    """Inserts ``count`` generated users in large batches.
+
+    Passwords are hashed only ``SEED_PASSWORDS`` times, so seeding is bound
+    by database writes. PostgreSQL database is loaded with COPY, others with
+    multi-row inserts. Users whose email is taken are skipped.
+
+    Returns:
+        inserted (int): number of inserted users.
+    """
+    started = time.perf_counter()
+    hashes = precompute_hashes()
+    rows = (
+        (username, email, hashes[password])
+        for username, email, password in generate_users(count, seed)
+    )
+
+    if db.engine.dialect.name == "postgresql":
+
+        def report(copied):
+            rate = copied / (time.perf_counter() - started)
+            echo(f"{copied} users generated, {rate:.0f} rows/sec")
+
+        _, inserted = copy_users(rows, report)
+    else:
+        inserted = 0
+        statement = User.__table__.insert().prefix_with("OR IGNORE", dialect="sqlite")
+        while True:
+            batch = [
+                {"username": username, "email": email, "password": password}
+                for username, email, password in itertools.islice(rows, batch_size)
+            ]
+            if not batch:
+                break
+            inserted += db.session.execute(statement, batch).rowcount
+            db.session.commit()
+            echo(f"{inserted} users inserted")
+
+    elapsed = time.perf_counter() - started
+    echo(
+        f"{inserted} users inserted in {elapsed:.1f}s ({count / elapsed:.0f} rows/sec)"
+    )
+    return inserted
@@ -1,14 +1,25 @@
-from flask import request
-from flask_restx import Namespace, Resource, fields
+import json
 
+from flask import Response, current_app, request, stream_with_context, url_for
+from flask_restx import Namespace, Resource, fields, inputs
+from jsonschema import Draft4Validator
+
+from project import hasher
+from project.api.conditional import is_not_modified, make_etag, not_modified, validators
+from project.api.representations import dumps
+from project.api.serializers import Serializer, serialize_with
 from project.api.users.crud import (
     add_user,
+    bulk_add_users,
     delete_user,
-    get_all_users,
     get_user_by_email,
     get_user_by_id,
+    get_users_page,
+    get_users_page_state,
+    iter_users,
     update_user,
 )
+from project.api.users.models import User
 
 namespace = Namespace("users")
 
@@ -26,14 +37,54 @@ user_post = namespace.inherit(
     "User POST", user, {"password": fields.String(required=True)}
 )
 
+user_serializer = Serializer(user)
+
+users_parser = namespace.parser()
+users_parser.add_argument("limit", type=inputs.positive, location="args")
+users_parser.add_argument("cursor", location="args")
+
 
 class UsersList(Resource):
     """Represents /users endpoint"""
 
-    @namespace.marshal_with(user, as_list=True)
+    @serialize_with(namespace, user, as_list=True)
+    @namespace.expect(users_parser)
+    @namespace.response(200, "Success")
+    @namespace.response(304, "Not modified")
+    @namespace.response(400, "Invalid cursor")
     def get(self):
-        """Returns all users."""
-        return get_all_users(), 200
+        """Returns a page of users.
+
+        Link to the next page is sent in ``Link`` header.
+        """
+        args = users_parser.parse_args()
+        limit = min(
+            args.get("limit") or current_app.config["USERS_PAGE_SIZE"],
+            current_app.config["USERS_MAX_PAGE_SIZE"],
+        )
+        cursor = args.get("cursor")
+
+        try:
+            # cheap aggregate answers revalidation without reading the page;
+            # no Last-Modified, as deleting a user does not make page newer
+            if request.if_none_match:
+                etag = make_etag(limit, cursor, *get_users_page_state(limit, cursor))
+                if is_not_modified(etag):
+                    return not_modified(validators(etag))
+
+            users, next_cursor, state = get_users_page(limit, cursor)
+        except ValueError:
+            namespace.abort(400, "Invalid cursor")
+
+        headers = validators(make_etag(limit, cursor, *state))
+
+        if next_cursor:
+            next_url = url_for(
+                request.endpoint, limit=limit, cursor=next_cursor, _external=True
+            )
+            headers["Link"] = f'<{next_url}>; rel="next"'
+
+        return users, 200, headers
 
     @namespace.expect(user_post, validate=True)
     @namespace.response(201, "user <user_email> was created")
@@ -46,19 +97,118 @@ class UsersList(Resource):
         email = payload.get("email")
         password = payload.get("password")
 
-        user = get_user_by_email(email)
-        if not user:
-            add_user(username, email, password)
+        if add_user(username, email, password):
             return {"message": f"user {email} was created", "status": "success"}, 201
         else:
             return {"message": f"user {email} already exists", "status": "failed"}, 400
 
 
+def parse_bulk_payload():
+    """Returns list of items sent as JSON array or newline delimited JSON.
+
+    Line of NDJSON which is not valid JSON is returned as None.
+    """
+    if request.mimetype == "application/x-ndjson":
+        items = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(None)
+        return items
+
+    items = request.get_json(silent=True)
+    if not isinstance(items, list):
+        namespace.abort(400, "Expected list of users")
+    return items
+
+
+class UsersBulk(Resource):
+    """Represents /users/bulk endpoint"""
+
+    @namespace.expect([user_post])
+    @namespace.response(200, "Result of every user: created, exists or invalid")
+    @namespace.response(400, "Expected list of users")
+    @namespace.response(413, "Too many users")
+    def post(self):
+        """Creates many users.
+
+        Accepts JSON array or newline delimited JSON of users. Users are
+        validated one by one, so invalid user does not fail the whole request.
+        """
+        items = parse_bulk_payload()
+        max_items = current_app.config["USERS_BULK_MAX_ITEMS"]
+        if len(items) > max_items:
+            namespace.abort(413, f"At most {max_items} users can be created at once")
+
+        validator = Draft4Validator(
+            user_post.__schema__,
+            resolver=self.api.refresolver,
+            format_checker=self.api.format_checker,
+        )
+        results = []
+        accepted = {}
+        for index, item in enumerate(items):
+            if item is None:
+                results.append({"index": index, "status": "invalid"})
+                continue
+
+            errors = dict(
+                user_post.format_error(e) for e in validator.iter_errors(item)
+            )
+            if errors:
+                results.append({"index": index, "status": "invalid", "errors": errors})
+                continue
+
+            email = User.normalize_email(item["email"])
+            results.append({"index": index, "email": email, "status": "exists"})
+            accepted.setdefault(email, item)
+
+        passwords = hasher.generate_password_hashes(
+            [item["password"] for item in accepted.values()]
+        )
+        rows = [
+            {"username": item["username"], "email": email, "password": password}
+            for (email, item), password in zip(accepted.items(), passwords)
+        ]
+        created = bulk_add_users(rows, current_app.config["USERS_BULK_CHUNK_SIZE"])
+
+        for result in results:
+            email = result.get("email")
+            if email in created and accepted.pop(email, None):
+                result["status"] = "created"
+
+        summary = {"created": 0, "exists": 0, "invalid": 0}
+        for result in results:
+            summary[result["status"]] += 1
+        return {**summary, "results": results}, 200
+
+
+class UsersExport(Resource):
+    """Represents /users/export endpoint"""
+
+    @namespace.response(200, "Newline delimited JSON stream of all users")
+    def get(self):
+        """Streams all users as newline delimited JSON."""
+        batch_size = current_app.config["USERS_EXPORT_BATCH_SIZE"]
+
+        def generate():
+            for entry in iter_users(batch_size):
+                yield dumps(user_serializer.serialize_one(entry)) + b"\n"
+
+        return Response(
+            stream_with_context(generate()), mimetype="application/x-ndjson"
+        )
+
+
 class Users(Resource):
     """Represents /users/<user_id> endpoint"""
 
-    @namespace.marshal_with(user)
+    @serialize_with(namespace, user)
     @namespace.response(200, "Success")
+    @namespace.response(304, "Not modified")
     @namespace.response(404, "User with id <user_id> does not exists")
     def get(self, user_id):
         """Returns a single user."""
@@ -66,7 +216,12 @@ class Users(Resource):
         user = get_user_by_id(user_id)
         if not user:
             namespace.abort(404, f"User with id {user_id} does not exists")
-        return user, 200
+
+        etag = make_etag(user.id, user.version)
+        headers = validators(etag, user.updated_date or user.created_date)
+        if is_not_modified(etag, user.updated_date or user.created_date):
+            return not_modified(headers)
+        return user, 200, headers
 
     @namespace.expect(user, validate=True)
     @namespace.response(200, "User with id <user_id> was updated")
@@ -86,7 +241,9 @@ class Users(Resource):
         if get_user_by_email(email) != user:
             namespace.abort(400, f"{email} is already taken")
 
-        update_user(user, username, email)
+        # email may be taken concurrently after the check above
+        if not update_user(user, username, email):
+            namespace.abort(400, f"{email} is already taken")
 
         return {"message": f"User {email} was updated", "status": "success"}, 200
 
@@ -107,4 +264,6 @@ class Users(Resource):
 
 
 namespace.add_resource(UsersList, "")
+namespace.add_resource(UsersExport, "/export")
+namespace.add_resource(UsersBulk, "/bulk")
 namespace.add_resource(Users, "/<int:user_id>")
@@ -0,0 +1,313 @@
+import datetime
+import json
+import os
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+
+class LRUCache:
+    """Bounded in-memory cache with time-to-live of entries.
+
+    When cache is full the least recently used entry is evicted.
+    """
+
+    shared = False
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns cached value or None if key is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def add(self, key, value, ttl=None):
+        """Stores value unless key holds one which has not expired yet."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= time.monotonic():
+                return
+        self.set(key, value, ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Returns hit, miss and eviction counters and current size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+
+def _encode(value):
+    def default(obj):
+        if isinstance(obj, datetime.datetime):
+            return {"__datetime__": obj.isoformat()}
+        raise TypeError(f"Can't cache value of type {type(obj).__name__}")
+
+    return json.dumps(value, default=default)
+
+
+def _decode(data):
+    def object_hook(obj):
+        if obj.keys() == {"__datetime__"}:
+            return datetime.datetime.fromisoformat(obj["__datetime__"])
+        return obj
+
+    return json.loads(data, object_hook=object_hook)
+
+
+def default_sqlite_path():
+    """Returns path of cache file in directory private to the current user."""
+    return os.path.join(
+        tempfile.gettempdir(), f"users-cache-{os.getuid()}", "cache.sqlite3"
+    )
+
+
+def _check_private(path, is_dir):
+    info = os.lstat(path)
+    kind = stat.S_ISDIR if is_dir else stat.S_ISREG
+    if not kind(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f"Refusing cache {path} not owned by current user")
+    if is_dir and stat.S_IMODE(info.st_mode) & 0o077:
+        raise PermissionError(f"Refusing cache directory {path} accessible by others")
+
+
+def prepare_sqlite_path(path):
+    """Creates cache file owned by and accessible to the current user only.
+
+    Directory of the default path is created with mode 0700. Existing file,
+    or directory of the default path, owned by someone else is refused.
+
+    Raises:
+        PermissionError: if file or directory is not private.
+    """
+    if path == default_sqlite_path():
+        directory = os.path.dirname(path)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        _check_private(directory, is_dir=True)
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY | os.O_NOFOLLOW, 0o600)
+    except FileExistsError:
+        _check_private(path, is_dir=False)
+    else:
+        os.close(fd)
+
+
+class SQLiteCache:
+    """Cache stored in SQLite database file shared by all processes on the host.
+
+    Values are stored as JSON, so they may contain only JSON types and
+    datetimes. Expired entries and entries beyond ``max_size``, in order of
+    their expiration, are evicted by every process at most once per
+    ``evict_interval`` seconds, so cache may be briefly larger than that.
+    Hit, miss and eviction counters are kept per process.
+    """
+
+    shared = True
+
+    def __init__(self, path, max_size, ttl, evict_interval=1):
+        self.path = path or default_sqlite_path()
+        self.max_size = max_size
+        self.ttl = ttl
+        self.evict_interval = evict_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._evicted_at = time.monotonic()
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        # sqlite connections can be shared neither by threads nor after fork
+        if getattr(self._local, "pid", None) != os.getpid():
+            prepare_sqlite_path(self.path)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS ix_cache_expires_at ON cache (expires_at)"
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    def get(self, key):
+        """Returns cached value or None if key is missing or expired."""
+        row = self.connection.execute(
+            "SELECT value FROM cache WHERE key = ? AND expires_at >= ?",
+            (key, time.time()),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return _decode(row[0])
+
+    def set(self, key, value, ttl=None):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, _encode(value), time.time() + (ttl or self.ttl)),
+        )
+        self._evict_due()
+
+    def add(self, key, value, ttl=None):
+        """Stores value unless key holds one which has not expired yet."""
+        now = time.time()
+        self.connection.execute(
+            "INSERT INTO cache (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, "
+            "expires_at = excluded.expires_at WHERE cache.expires_at < ?",
+            (key, _encode(value), now + (ttl or self.ttl), now),
+        )
+        self._evict_due()
+
+    def delete(self, key):
+        self.connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        self.connection.execute("DELETE FROM cache")
+
+    def evict(self):
+        """Deletes expired entries and the soonest expiring beyond ``max_size``."""
+        connection = self.connection
+        connection.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+        self.evictions += connection.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache "
+            "ORDER BY expires_at LIMIT max(0, (SELECT count(*) FROM cache) - ?))",
+            (self.max_size,),
+        ).rowcount
+        self._evicted_at = time.monotonic()
+
+    def _evict_due(self):
+        if time.monotonic() - self._evicted_at >= self.evict_interval:
+            self.evict()
+
+    def stats(self):
+        """Returns hit, miss and eviction counters and current size."""
+        (size,) = self.connection.execute("SELECT count(*) FROM cache").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": size,
+        }
+
+
+def create_backend(config):
+    """Creates cache backend selected by ``CACHE_BACKEND`` option."""
+    backend = config["CACHE_BACKEND"]
+    if backend == "memory":
+        return LRUCache(config["CACHE_MAX_SIZE"], config["CACHE_TTL"])
+    if backend == "sqlite":
+        return SQLiteCache(
+            config["CACHE_SQLITE_PATH"],
+            config["CACHE_MAX_SIZE"],
+            config["CACHE_TTL"],
+            config["CACHE_SQLITE_EVICT_INTERVAL"],
+        )
+    raise ValueError(f"Unknown cache backend {backend}")
+
+
+class Cache:
+    """Cache of frequently read records.
+
+    Cache is used only when ``CACHE_ENABLED`` is set. ``CACHE_BACKEND`` selects
+    where entries are kept: ``memory`` keeps them in every process separately,
+    ``sqlite`` keeps them in ``CACHE_SQLITE_PATH`` file shared by all processes
+    on the host, so entry deleted by one process is gone for all of them. By
+    default the file is kept in directory private to the user running the
+    application.
+    """
+
+    def __init__(self, app=None):
+        self._backend = None
+        self._lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["cache"] = self
+
+    @property
+    def enabled(self):
+        return current_app.config["CACHE_ENABLED"]
+
+    @property
+    def shared(self):
+        """Tests whether cache is enabled and its entries are seen by all processes."""
+        return self.enabled and self.backend.shared
+
+    @property
+    def backend(self):
+        with self._lock:
+            if self._backend is None:
+                self._backend = create_backend(current_app.config)
+            return self._backend
+
+    def get(self, key):
+        return self.backend.get(key) if self.enabled else None
+
+    def set(self, key, value, ttl=None):
+        if self.enabled:
+            self.backend.set(key, value, ttl)
+
+    def add(self, key, value, ttl=None):
+        """Stores value unless key holds one which has not expired yet."""
+        if self.enabled:
+            self.backend.add(key, value, ttl)
+
+    def delete(self, key):
+        if self.enabled:
+            self.backend.delete(key)
+
+    def stats(self):
+        """Returns cache counters, empty if cache was never used."""
+        return self._backend.stats() if self._backend is not None else {}
+
+    def reset(self):
+        """Drops all entries and counters."""
+        with self._lock:
+            self._backend = None
@@ -0,0 +1,169 @@
+import gzip
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import Response, current_app, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+def _compressor(encoding, config):
+    """Returns functions compressing chunk of data and finishing the stream."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=config["COMPRESS_BR_LEVEL"])
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(config["COMPRESS_LEVEL"], zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+
+def compress(data, encoding, config):
+    """Returns data compressed with given content encoding."""
+    if encoding == "br":
+        return brotli.compress(data, quality=config["COMPRESS_BR_LEVEL"])
+    return gzip.compress(data, config["COMPRESS_LEVEL"])
+
+
+def _stream(chunks, charset, encoding, config):
+    process, finish = _compressor(encoding, config)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode(charset)
+            data = process(chunk)
+            if data:
+                yield data
+        yield finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+class Compress:
+    """Compresses responses with gzip or brotli, if it is installed.
+
+    Only responses with mimetype listed in ``COMPRESS_MIMETYPES`` and at least
+    ``COMPRESS_MIN_SIZE`` bytes long are compressed. Streamed responses are
+    compressed chunk by chunk as they are sent. Compressed static files are
+    kept in memory, keyed by their ETag, so that each is compressed once.
+
+    Strong ETags of compressed responses are made weak, as the compressed
+    representation is not byte for byte the same.
+    """
+
+    def __init__(self, app=None):
+        self._files = OrderedDict()
+        self._lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.after_request(self._compress)
+        app.extensions["compress"] = self
+
+    @staticmethod
+    def encodings():
+        return ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def negotiate(self):
+        """Returns content encoding accepted by client or None."""
+        return request.accept_encodings.best_match(self.encodings())
+
+    def freeze(self, app, endpoint):
+        """Renders response of endpoint once and compresses it upfront.
+
+        Endpoint is replaced by view returning stored response, so it must
+        not depend on the request.
+        """
+        view = app.view_functions[endpoint]
+        rule = next(app.url_map.iter_rules(endpoint))
+        with app.test_request_context(rule.rule):
+            response = app.make_response(view())
+        data = response.get_data()
+        mimetype = response.mimetype
+        etag = hashlib.sha1(data).hexdigest()
+        bodies = {None: data}
+        for encoding in self.encodings():
+            bodies[encoding] = compress(data, encoding, app.config)
+
+        def frozen(*args, **kwargs):
+            encoding = (
+                self.negotiate() if current_app.config["COMPRESS_ENABLED"] else None
+            )
+            response = Response(bodies[encoding], mimetype=mimetype)
+            if encoding:
+                response.headers["Content-Encoding"] = encoding
+            response.vary.add("Accept-Encoding")
+            response.set_etag(etag, weak=True)
+            return response.make_conditional(request)
+
+        app.view_functions[endpoint] = frozen
+
+    def _compress(self, response):
+        config = current_app.config
+        if (
+            not config["COMPRESS_ENABLED"]
+            or response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in config["COMPRESS_MIMETYPES"]
+        ):
+            return response
+
+        etag, weak = response.get_etag()
+        # files are compressed once, so they must be identified by ETag
+        is_file = response.direct_passthrough
+        if is_file and etag is None:
+            return response
+        if (
+            not response.is_streamed
+            and response.calculate_content_length() < config["COMPRESS_MIN_SIZE"]
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = self.negotiate()
+        if not encoding:
+            return response
+
+        if is_file:
+            data = self._compress_file(response, etag, encoding)
+            response.direct_passthrough = False
+            response.set_data(data)
+            response.headers.pop("Accept-Ranges", None)
+        elif response.is_streamed:
+            response.response = _stream(
+                response.response, response.charset, encoding, config
+            )
+            response.headers.pop("Content-Length", None)
+        else:
+            response.set_data(compress(response.get_data(), encoding, config))
+
+        response.headers["Content-Encoding"] = encoding
+        if etag is not None and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _compress_file(self, response, etag, encoding):
+        key = (request.path, etag, encoding)
+        try:
+            with self._lock:
+                data = self._files.get(key)
+                if data is not None:
+                    self._files.move_to_end(key)
+                    return data
+
+            data = compress(b"".join(response.response), encoding, current_app.config)
+            with self._lock:
+                self._files[key] = data
+                while len(self._files) > current_app.config["COMPRESS_CACHE_SIZE"]:
+                    self._files.popitem(last=False)
+            return data
+        finally:
+            response.close()
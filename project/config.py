@@ -1,36 +1,130 @@
 import os
 
 
+def database_url(name):
+    """Returns database URL from environment variable.
+
+    ``postgres://`` URLs given by Heroku and CI are renamed to
+    ``postgresql://``, the scheme of SQLAlchemy dialect.
+    """
+    url = os.getenv(name)
+    if url and url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    return url
+
+
 class BaseConfig:
     """Base configuration"""
 
     TESTING = False
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    DATABASE_REPLICA_URL = database_url("DATABASE_REPLICA_URL")
+    SQLALCHEMY_BINDS = (
+        {"replica": DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else None
+    )
+    DATABASE_REPLICA_STICKY_SECONDS = int(
+        os.getenv("DATABASE_REPLICA_STICKY_SECONDS", 5)
+    )
+    DATABASE_REPLICA_STICKY_COOKIE = "read_primary"
+    # pools are per process and per bind, one connection per request thread
+    # of gunicorn worker, so the primary takes at most workers * (pool size +
+    # max overflow) connections, see gunicorn.conf.py
+    DATABASE_POOL_SIZE = int(
+        os.getenv("DATABASE_POOL_SIZE", os.getenv("GUNICORN_THREADS", 4))
+    )
+    DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", 0))
+    DATABASE_POOL_TIMEOUT = int(os.getenv("DATABASE_POOL_TIMEOUT", 30))
+    DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", 1800))
+    DATABASE_POOL_PRE_PING = os.getenv("DATABASE_POOL_PRE_PING", "1") == "1"
+    DATABASE_STATEMENT_TIMEOUT = int(os.getenv("DATABASE_STATEMENT_TIMEOUT", 0))  # ms
+    DATABASE_IDLE_IN_TRANSACTION_TIMEOUT = int(
+        os.getenv("DATABASE_IDLE_IN_TRANSACTION_TIMEOUT", 0)
+    )  # ms
     SECRET_KEY = "my_precious"
-    BCRYPT_LOG_ROUNDS = 13
+    BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", 13))
+    BCRYPT_REHASH_ON_LOGIN = True
+    # per application process, see project.hashing.PasswordHasher
+    BCRYPT_EXECUTOR_WORKERS = int(os.getenv("BCRYPT_EXECUTOR_WORKERS", 1))
+    BCRYPT_EXECUTOR_QUEUE_DEPTH = int(
+        os.getenv("BCRYPT_EXECUTOR_QUEUE_DEPTH", 4 * BCRYPT_EXECUTOR_WORKERS)
+    )
+    BCRYPT_EXECUTOR_RETRY_AFTER = 1
     ACCESS_TOKEN_EXPIRATION = 15 * 60  # 15min
     REFRESH_TOKEN_EXPIRATION = 30 * 24 * 60 * 60  # 30 days
+    ACCESS_TOKEN_CLAIMS = True
+    AUTH_STATUS_VERIFY_DB = False
+    # seconds a process not sharing its cache may accept revoked access token
+    TOKEN_VERSION_LOCAL_TTL = int(os.getenv("TOKEN_VERSION_LOCAL_TTL", 5))
+    USERS_PAGE_SIZE = 100
+    USERS_MAX_PAGE_SIZE = 1000
+    USERS_EXPORT_BATCH_SIZE = 1000
+    # every user costs a bcrypt hash, whole batch has to be hashed well within
+    # gunicorn timeout, e.g. 100 hashes of 250ms take 25s on one process
+    USERS_BULK_MAX_ITEMS = 100
+    USERS_BULK_CHUNK_SIZE = 100
+    CACHE_ENABLED = True
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    # file in private temporary directory by default
+    CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH")
+    CACHE_SQLITE_EVICT_INTERVAL = 1
+    CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", 10000))
+    CACHE_TTL = int(os.getenv("CACHE_TTL", 60))
+    REQUEST_TIMING_ENABLED = True
+    REQUEST_TIMING_HEADER = True
+    REQUEST_TIMING_MAX_QUERIES = 10
+    REQUEST_TIMING_MAX_REPEATED_QUERIES = 3
+    METRICS_ENABLED = True
+    METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR")
+    METRICS_FLUSH_INTERVAL = 1
+    METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    JSON_BACKEND = os.getenv("JSON_BACKEND", "auto")
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "1") == "1"
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 500))
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", 6))
+    COMPRESS_BR_LEVEL = int(os.getenv("COMPRESS_BR_LEVEL", 4))
+    COMPRESS_MIMETYPES = (
+        "application/json",
+        "application/x-ndjson",
+        "application/javascript",
+        "text/css",
+        "text/html",
+        "text/javascript",
+        "text/plain",
+    )
+    COMPRESS_CACHE_SIZE = 64
+    READINESS_CACHE_TTL = float(os.getenv("READINESS_CACHE_TTL", 2))
+    READINESS_MIN_POOL_HEADROOM = 1
+    READINESS_DATABASE_TIMEOUT = float(os.getenv("READINESS_DATABASE_TIMEOUT", 2))
 
 
 class DevelopmentConfig(BaseConfig):
     """Configuration for Development environment"""
 
-    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
+    SQLALCHEMY_DATABASE_URI = database_url("DATABASE_URL")
     BCRYPT_LOG_ROUNDS = 4
+    BCRYPT_EXECUTOR_WORKERS = 0
 
 
 class TestingConfig(BaseConfig):
     """Configuration for Testing environment"""
 
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_TEST_URL")
+    SQLALCHEMY_DATABASE_URI = database_url("DATABASE_TEST_URL")
     BCRYPT_LOG_ROUNDS = 4
+    BCRYPT_EXECUTOR_WORKERS = 0
     ACCESS_TOKEN_EXPIRATION = 3
     REFRESH_TOKEN_EXPIRATION = 3
+    CACHE_ENABLED = False
 
 
 class ProductionConfig(BaseConfig):
     """Configuration for Production environment"""
 
-    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
+    SQLALCHEMY_DATABASE_URI = database_url("DATABASE_URL")
     SECRET_KEY = os.getenv("SECRET_KEY", "my_precious")
+    DATABASE_STATEMENT_TIMEOUT = int(os.getenv("DATABASE_STATEMENT_TIMEOUT", 30000))
+    DATABASE_IDLE_IN_TRANSACTION_TIMEOUT = int(
+        os.getenv("DATABASE_IDLE_IN_TRANSACTION_TIMEOUT", 60000)
+    )
+    # timings tell clients e.g. whether an account exists, they are only logged
+    REQUEST_TIMING_HEADER = False
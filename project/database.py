@@ -0,0 +1,187 @@
+import os
+from contextlib import contextmanager
+
+from flask import current_app, request
+from flask_sqlalchemy import SignallingSession
+from flask_sqlalchemy import SQLAlchemy as BaseSQLAlchemy
+from sqlalchemy import DateTime, event, exc, orm
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.functions import FunctionElement
+
+REPLICA = "replica"
+
+
+class utcnow(FunctionElement):
+    """Current time in UTC as timestamp without time zone.
+
+    Unlike ``now()`` it does not depend on time zone of database session.
+    """
+
+    type = DateTime()
+    name = "utcnow"
+
+
+@compiles(utcnow)
+def _utcnow(element, compiler, **kw):
+    # UTC on SQLite
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utcnow, "postgresql")
+def _utcnow_postgresql(element, compiler, **kw):
+    return "(now() AT TIME ZONE 'utc')"
+
+
+def engine_options(config, sa_url):
+    """Returns pool and timeout options for engine connecting to given URL.
+
+    SQLite engines keep pools chosen by Flask-SQLAlchemy, which do not accept
+    pool sizes. Server side timeouts are passed to Postgres at connect time,
+    zero disables them. Dialect is looked up, so that any URL scheme of it,
+    e.g. deprecated ``postgres://``, gets the timeouts.
+    """
+    options = {}
+    dialect = sa_url.get_dialect().name
+    if dialect != "sqlite":
+        options.update(
+            pool_size=config["DATABASE_POOL_SIZE"],
+            max_overflow=config["DATABASE_MAX_OVERFLOW"],
+            pool_timeout=config["DATABASE_POOL_TIMEOUT"],
+            pool_recycle=config["DATABASE_POOL_RECYCLE"],
+            pool_pre_ping=config["DATABASE_POOL_PRE_PING"],
+        )
+    if dialect == "postgresql":
+        timeouts = {
+            "statement_timeout": config["DATABASE_STATEMENT_TIMEOUT"],
+            "idle_in_transaction_session_timeout": config[
+                "DATABASE_IDLE_IN_TRANSACTION_TIMEOUT"
+            ],
+        }
+        settings = " ".join(
+            f"-c {name}={value}" for name, value in timeouts.items() if value
+        )
+        if settings:
+            options["connect_args"] = {"options": settings}
+    return options
+
+
+def _connect(dbapi_connection, connection_record):
+    connection_record.info["pid"] = os.getpid()
+
+
+def _checkout(dbapi_connection, connection_record, connection_proxy):
+    if connection_record.info["pid"] != os.getpid():
+        # connection was inherited from parent process, drop it without
+        # closing, so that socket still used by parent is left intact
+        connection_record.connection = connection_proxy.connection = None
+        raise exc.DisconnectionError("Connection belongs to another process")
+
+
+class RoutingSession(SignallingSession):
+    """Session sending reads marked by :meth:`SQLAlchemy.replica` to replica.
+
+    Once session wrote anything, all its queries go to the primary, so that
+    changes are read back even if replica lags behind.
+    """
+
+    def __init__(self, db, **options):
+        self.db = db
+        super().__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None):
+        if isinstance(clause, UpdateBase):
+            self.info["written"] = True
+        elif (
+            self.info.get(REPLICA)
+            and not self.info.get("written")
+            and not self.info.get("primary")
+            and not self._flushing
+            and REPLICA in (self.app.config["SQLALCHEMY_BINDS"] or ())
+        ):
+            return self.db.get_engine(self.app, bind=REPLICA)
+        return super().get_bind(mapper, clause)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _after_flush(session, flush_context):
+    session.info["written"] = True
+
+
+class SQLAlchemy(BaseSQLAlchemy):
+    """Flask-SQLAlchemy configured from ``DATABASE_*`` options and fork safe.
+
+    Connections opened before the process was forked are never handed out
+    in the child, pool replaces them with new ones on checkout.
+
+    When ``replica`` bind is configured, reads wrapped in :meth:`replica` go
+    to it, except in requests which wrote to the primary. Clients which wrote
+    keep reading from the primary for ``DATABASE_REPLICA_STICKY_SECONDS``
+    afterwards. They are marked by ``DATABASE_REPLICA_STICKY_COOKIE`` cookie
+    expiring by then, so that any process and no other client honors it.
+    """
+
+    def init_app(self, app):
+        super().init_app(app)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    @contextmanager
+    def replica(self):
+        """Sends queries executed within the block to replica if possible."""
+        info = self.session.info
+        previous = info.get(REPLICA)
+        info[REPLICA] = True
+        try:
+            yield
+        finally:
+            info[REPLICA] = previous
+
+    def _start(self):
+        info = self.session.info
+        info.pop("written", None)
+        info.pop("primary", None)
+        if self._sticky_enabled():
+            cookie = current_app.config["DATABASE_REPLICA_STICKY_COOKIE"]
+            info["primary"] = cookie in request.cookies
+
+    def _finish(self, response):
+        if self.session.info.get("written") and self._sticky_enabled():
+            response.set_cookie(
+                current_app.config["DATABASE_REPLICA_STICKY_COOKIE"],
+                "1",
+                max_age=current_app.config["DATABASE_REPLICA_STICKY_SECONDS"],
+                secure=request.is_secure,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def _sticky_enabled(self):
+        return (
+            REPLICA in (current_app.config["SQLALCHEMY_BINDS"] or ())
+            and current_app.config["DATABASE_REPLICA_STICKY_SECONDS"] > 0
+        )
+
+    def apply_driver_hacks(self, app, sa_url, options):
+        options.update(engine_options(app.config, sa_url))
+        super().apply_driver_hacks(app, sa_url, options)
+
+    def create_engine(self, sa_url, engine_opts):
+        engine = super().create_engine(sa_url, engine_opts)
+        event.listen(engine, "connect", _connect)
+        event.listen(engine, "checkout", _checkout)
+        return engine
+
+    def dispose_engines(self, app):
+        """Closes pooled connections of all engines of given app.
+
+        Meant to be called in parent process before forking workers.
+        """
+        state = app.extensions.get("sqlalchemy")
+        for connector in state.connectors.values() if state else ():
+            if connector._engine is not None:
+                connector._engine.dispose()
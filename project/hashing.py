@@ -0,0 +1,228 @@
+import collections
+import math
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+from flask import current_app
+
+from project.timing import timed
+
+
+class HasherBusy(Exception):
+    """Raised when too many hashing jobs are waiting for the pool."""
+
+
+def handle_hasher_busy(error):
+    """Asks client to retry later when password hashing pool is saturated."""
+    retry_after = current_app.config["BCRYPT_EXECUTOR_RETRY_AFTER"]
+    return (
+        {"message": "Service is busy, try again later"},
+        503,
+        {"Retry-After": str(retry_after)},
+    )
+
+
+def _to_bytes(value):
+    return value.encode("utf-8") if isinstance(value, str) else value
+
+
+def _hash_password(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds, b"2b")).decode()
+
+
+def _check_password(pw_hash, password):
+    return bcrypt.checkpw(password, pw_hash)
+
+
+def get_rounds(pw_hash):
+    """Returns work factor encoded in bcrypt hash."""
+    return int(_to_bytes(pw_hash).split(b"$")[2])
+
+
+# work factor below this is never recommended, whatever the latency
+MIN_RECOMMENDED_ROUNDS = 12
+
+
+def calibrate_rounds(
+    target, samples=5, min_rounds=4, max_rounds=16, floor=MIN_RECOMMENDED_ROUNDS
+):
+    """Measures bcrypt latency on this host for increasing work factors.
+
+    Args:
+        target (float): acceptable 99th percentile of hashing time in seconds.
+        samples (int): number of hashes measured for every work factor.
+        min_rounds (int): the lowest work factor to measure.
+        max_rounds (int): the highest work factor to measure.
+        floor (int): the lowest work factor which can be recommended.
+
+    Returns:
+        tuple: the highest work factor meeting the target but at least
+            ``floor``, list of ``(rounds, p99)`` pairs measured and whether
+            the recommended work factor meets the target.
+    """
+    recommended = None
+    timings = []
+    for rounds in range(min_rounds, max_rounds + 1):
+        durations = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            _hash_password(b"calibration", rounds)
+            durations.append(time.perf_counter() - started)
+
+        durations.sort()
+        p99 = durations[math.ceil(0.99 * len(durations)) - 1]
+        timings.append((rounds, p99))
+        if p99 > target:
+            break
+        recommended = rounds
+
+    if recommended is None or recommended < floor:
+        return floor, timings, False
+    return recommended, timings, True
+
+
+class PasswordHasher:
+    """Runs bcrypt hashing in a small pool of worker processes.
+
+    Hashing with production work factor takes hundreds of milliseconds of CPU.
+    Every application process submits jobs to its own pool of
+    ``BCRYPT_EXECUTOR_WORKERS`` processes (one by default), so threads of the
+    process keep serving requests meanwhile and the host runs at most as many
+    hashes at once as there are application processes times pool size.
+
+    At most ``BCRYPT_EXECUTOR_QUEUE_DEPTH`` jobs of the process may be running
+    or waiting at once and :class:`HasherBusy` is raised beyond that. The limit
+    is per process, it bounds how long requests of the process wait for the
+    pool, not how many hashes run on the host. Zero workers means hashing is
+    done inline in the calling thread.
+    """
+
+    def __init__(self, app=None):
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._dummy_hashes = {}
+        self.pending = 0
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # raised outside of the API as well, e.g. by admin views
+        app.register_error_handler(HasherBusy, handle_hasher_busy)
+        app.extensions["password_hasher"] = self
+
+    def generate_password_hash(self, password):
+        """Returns bcrypt hash of the password as a string."""
+        rounds = current_app.config["BCRYPT_LOG_ROUNDS"]
+        return self._run(_hash_password, _to_bytes(password), rounds)
+
+    def check_password_hash(self, pw_hash, password):
+        """Tests password against bcrypt hash."""
+        return self._run(_check_password, _to_bytes(pw_hash), _to_bytes(password))
+
+    def check_dummy_password(self, password):
+        """Spends as long as checking password of an existing user would.
+
+        Used when there is no user to check the password of, so that response
+        time does not tell whether the user exists. Always returns False.
+        """
+        rounds = current_app.config["BCRYPT_LOG_ROUNDS"]
+        dummy_hash = self._dummy_hashes.get(rounds)
+        if dummy_hash is None:
+            dummy_hash = _to_bytes(_hash_password(os.urandom(16), rounds))
+            self._dummy_hashes[rounds] = dummy_hash
+        self._run(_check_password, dummy_hash, _to_bytes(password or ""))
+        return False
+
+    def generate_password_hashes(self, passwords):
+        """Returns bcrypt hashes of many passwords computed by the pool.
+
+        Every hash takes its own place in the queue and at most pool size of
+        them are submitted at once, so hashes of other requests are not
+        starved by the batch.
+        """
+        rounds = current_app.config["BCRYPT_LOG_ROUNDS"]
+        passwords = [_to_bytes(password) for password in passwords]
+        return self._run_many(_hash_password, passwords, [rounds] * len(passwords))
+
+    def needs_rehash(self, pw_hash):
+        """Tests whether hash was created with other than configured work factor."""
+        return get_rounds(pw_hash) != current_app.config["BCRYPT_LOG_ROUNDS"]
+
+    def _run(self, func, *args):
+        workers = current_app.config["BCRYPT_EXECUTOR_WORKERS"]
+        with timed("hash"):
+            if not workers:
+                return func(*args)
+
+            return self._collect(self._submit(workers, func, *args))
+
+    def _run_many(self, func, *iterables):
+        workers = current_app.config["BCRYPT_EXECUTOR_WORKERS"]
+        with timed("hash"):
+            if not workers:
+                return list(map(func, *iterables))
+
+            # batch alone never fills the queue
+            size = max(
+                1, min(workers, current_app.config["BCRYPT_EXECUTOR_QUEUE_DEPTH"])
+            )
+            results = []
+            window = collections.deque()
+            try:
+                for args in zip(*iterables):
+                    if len(window) >= size:
+                        results.append(self._collect(window.popleft()))
+                    window.append(self._submit(workers, func, *args))
+                while window:
+                    results.append(self._collect(window.popleft()))
+                return results
+            finally:
+                # after failure jobs not started yet are dropped, places of
+                # running ones are freed when they finish
+                for future in window:
+                    future.cancel()
+                    future.add_done_callback(lambda future: self._release())
+
+    def _submit(self, workers, func, *args):
+        """Takes place in the queue and submits job to the pool."""
+        with self._lock:
+            if self.pending >= current_app.config["BCRYPT_EXECUTOR_QUEUE_DEPTH"]:
+                raise HasherBusy()
+            self.pending += 1
+            executor = self._get_executor(workers)
+        try:
+            return executor.submit(func, *args)
+        except BaseException:
+            self._release()
+            raise
+
+    def _collect(self, future):
+        """Waits for the job and frees its place in the queue."""
+        try:
+            return future.result()
+        finally:
+            self._release()
+
+    def _release(self):
+        with self._lock:
+            self.pending -= 1
+
+    def shutdown(self):
+        """Stops worker processes of the pool, it is started again when needed."""
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown()
+            self._executor = None
+            self._pid = None
+
+    def _get_executor(self, workers):
+        # pool inherited from parent process is unusable after fork
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+            self._pid = os.getpid()
+        return self._executor
@@ -0,0 +1,320 @@
+import bisect
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, request
+
+DESCRIPTIONS = {
+    "http_requests_total": "Number of handled requests.",
+    "http_request_duration_seconds": "Time spent handling requests.",
+}
+
+# samples of exited processes, see mark_process_dead
+ARCHIVE = "metrics_archive.json"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in labels)
+    return f"{{{pairs}}}"
+
+
+def _format_number(value):
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+@contextmanager
+def _locked(directory, operation):
+    # archiving must not be seen half done by processes reading samples
+    with open(os.path.join(directory, "metrics.lock"), "a") as lock:
+        fcntl.flock(lock, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as dump:
+            return json.load(dump)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_snapshot(path, snapshot):
+    with open(f"{path}.tmp", "w") as dump:
+        json.dump(snapshot, dump)
+    os.replace(f"{path}.tmp", path)
+
+
+def _merge(snapshots):
+    counters, histograms, gauges = {}, {}, {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"]:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, buckets, total, count in snapshot["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.setdefault(key, [[0] * len(buckets), 0, 0])
+            merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+            merged[1] += total
+            merged[2] += count
+        for name, labels, value in snapshot["gauges"]:
+            key = (name, tuple(map(tuple, labels)))
+            gauges[key] = gauges.get(key, 0) + value
+    return counters, histograms, gauges
+
+
+def mark_process_dead(pid, directory):
+    """Moves counters and histograms of exited process to the archive.
+
+    Called by gunicorn master when a worker exits, as ``mark_process_dead``
+    of prometheus_client is. Samples of the worker keep being counted, its
+    gauges are dropped and the number of files read on scrape does not grow
+    with worker restarts. The file is removed, so a worker reusing the pid
+    starts from zero instead of overwriting totals of the exited one.
+    """
+    path = os.path.join(directory, f"metrics_{pid}.json")
+    archive_path = os.path.join(directory, ARCHIVE)
+    with _locked(directory, fcntl.LOCK_EX):
+        snapshot = _read_snapshot(path)
+        if snapshot is not None:
+            archive = _read_snapshot(archive_path)
+            counters, histograms, _ = _merge(filter(None, [archive, snapshot]))
+            counters = [[*key, value] for key, value in counters.items()]
+            histograms = [[*key, *value] for key, value in histograms.items()]
+            _write_snapshot(
+                archive_path,
+                {"counters": counters, "histograms": histograms, "gauges": []},
+            )
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class Metrics:
+    """Collects request counts, latency histograms, counters and gauges.
+
+    Samples are kept in memory of every process and recording them takes
+    a single short lock. When ``METRICS_MULTIPROC_DIR`` is set, every process
+    dumps its samples to own file in that directory at most once per
+    ``METRICS_FLUSH_INTERVAL`` seconds and once more when it exits, and
+    :meth:`render` sums samples of all processes and of the archive of exited
+    ones, see :func:`mark_process_dead`, so any gunicorn worker can answer
+    a scrape. Gauges of processes which are gone are dropped.
+    """
+
+    def __init__(self, app=None):
+        self.descriptions = dict(DESCRIPTIONS)
+        self.gauges = {}
+        self.counters = {}
+        self.ratios = {}
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._flushed = 0.0
+        self._pid = None
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.extensions["metrics"] = self
+
+    def gauge(self, name, description):
+        """Registers function returning gauge value collected on scrape.
+
+        Function returns either a number or a dict of label tuples to numbers.
+        """
+
+        def wrapper(func):
+            self.descriptions[name] = description
+            self.gauges[name] = func
+            return func
+
+        return wrapper
+
+    def counter(self, name, description):
+        """Registers function returning counter value collected on scrape.
+
+        Function returns the total of this process, which never decreases.
+        """
+
+        def wrapper(func):
+            self.descriptions[name] = description
+            self.counters[name] = func
+            return func
+
+        return wrapper
+
+    def ratio(self, name, description, numerator, denominator):
+        """Registers gauge computed from samples summed over all processes."""
+        self.descriptions[name] = description
+        self.ratios[name] = (numerator, denominator)
+
+    def inc(self, name, labels=(), value=1):
+        key = (name, tuple(labels))
+        with self._lock:
+            self._check_pid()
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        buckets = current_app.config["METRICS_BUCKETS"]
+        index = bisect.bisect_left(buckets, value)
+        key = (name, tuple(labels))
+        with self._lock:
+            self._check_pid()
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(buckets) + 1), 0, 0]
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def _check_pid(self):
+        # samples inherited from parent process were already counted there
+        if self._pid != os.getpid():
+            self._counters.clear()
+            self._histograms.clear()
+            self._pid = os.getpid()
+
+    def _start(self):
+        if current_app.config["METRICS_ENABLED"]:
+            g.metrics_started = time.perf_counter()
+
+    def _finish(self, response):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return response
+
+        labels = (
+            ("endpoint", request.endpoint or "none"),
+            ("method", request.method),
+            ("status", str(response.status_code)),
+        )
+        self.inc("http_requests_total", labels)
+        self.observe(
+            "http_request_duration_seconds", labels, time.perf_counter() - started
+        )
+
+        directory = current_app.config["METRICS_MULTIPROC_DIR"]
+        interval = current_app.config["METRICS_FLUSH_INTERVAL"]
+        if directory and time.monotonic() - self._flushed > interval:
+            self.flush(directory)
+
+        return response
+
+    def snapshot(self):
+        """Returns samples of this process in JSON serializable form."""
+        with self._lock:
+            self._check_pid()
+            counters = [
+                [name, labels, value]
+                for (name, labels), value in self._counters.items()
+            ]
+            histograms = [
+                [name, labels, list(buckets), total, count]
+                for (name, labels), (buckets, total, count) in self._histograms.items()
+            ]
+
+        counters.extend([name, [], func()] for name, func in self.counters.items())
+
+        gauges = []
+        for name, func in self.gauges.items():
+            value = func()
+            samples = value if isinstance(value, dict) else {(): value}
+            gauges.extend(
+                [name, labels, sample]
+                for labels, sample in samples.items()
+                if sample is not None
+            )
+
+        return {"counters": counters, "histograms": histograms, "gauges": gauges}
+
+    def flush(self, directory):
+        """Dumps samples of this process to file in given directory."""
+        path = os.path.join(directory, f"metrics_{os.getpid()}.json")
+        _write_snapshot(path, self.snapshot())
+        self._flushed = time.monotonic()
+
+    def collect(self):
+        """Returns samples of all processes summed by name and labels."""
+        snapshots = [self.snapshot()]
+        directory = current_app.config["METRICS_MULTIPROC_DIR"]
+        if directory:
+            with _locked(directory, fcntl.LOCK_SH):
+                for path in glob.glob(os.path.join(directory, "metrics_*.json")):
+                    name = os.path.basename(path).split("_")[1].split(".")[0]
+                    pid = int(name) if name.isdigit() else None
+                    if pid == os.getpid():
+                        continue
+                    snapshot = _read_snapshot(path)
+                    if snapshot is None:
+                        continue
+                    if pid is not None and not _pid_alive(pid):
+                        snapshot["gauges"] = []
+                    snapshots.append(snapshot)
+
+        counters, histograms, gauges = _merge(snapshots)
+
+        samples = {**gauges, **counters}
+        for name, (numerator, denominator) in self.ratios.items():
+            total = samples.get((denominator, ()), 0)
+            if total:
+                gauges[(name, ())] = samples.get((numerator, ()), 0) / total
+
+        return counters, histograms, gauges
+
+    def render(self):
+        """Returns metrics of all processes in Prometheus text format."""
+        counters, histograms, gauges = self.collect()
+        bounds = list(current_app.config["METRICS_BUCKETS"]) + [float("inf")]
+        lines = []
+        typed = set()
+
+        def declare(name, kind):
+            if name not in typed:
+                typed.add(name)
+                if name in self.descriptions:
+                    lines.append(f"# HELP {name} {self.descriptions[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            declare(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {_format_number(value)}")
+
+        for (name, labels), (buckets, total, count) in sorted(histograms.items()):
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, bucket in zip(bounds, buckets):
+                cumulative += bucket
+                bucket_labels = labels + (("le", _format_number(bound)),)
+                lines.append(
+                    f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}"
+                )
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_number(total)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        for (name, labels), value in sorted(gauges.items()):
+            declare(name, "gauge")
+            lines.append(f"{name}{_format_labels(labels)} {_format_number(value)}")
+
+        return "\n".join(lines) + "\n"
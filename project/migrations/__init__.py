@@ -0,0 +1,124 @@
+import importlib
+import pkgutil
+
+from sqlalchemy import text
+
+from project.migrations import versions
+
+
+class Migration:
+    """Versioned list of schema changes"""
+
+    def __init__(self, version, name, operations):
+        self.version = version
+        self.name = name
+        self.operations = operations
+
+    def __repr__(self):
+        return f"Migration {self.version} {self.name}"
+
+
+def load_migrations():
+    """Returns migrations defined in ``versions`` package ordered by version.
+
+    Module ``0001_create_tables`` defines migration with version ``0001`` and
+    lists its changes in ``operations`` attribute.
+    """
+    migrations = []
+    for module_info in sorted(pkgutil.iter_modules(versions.__path__)):
+        module = importlib.import_module(f"{versions.__name__}.{module_info.name}")
+        version, _, name = module_info.name.partition("_")
+        migrations.append(Migration(version, name, module.operations))
+    return sorted(migrations, key=lambda migration: migration.version)
+
+
+def _ensure_versions_table(connection):
+    connection.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations "
+            "(version VARCHAR(32) PRIMARY KEY, applied_at TIMESTAMP NOT NULL "
+            "DEFAULT CURRENT_TIMESTAMP)"
+        )
+    )
+
+
+def applied_versions(connection):
+    """Returns versions of migrations already applied to the database."""
+    if not connection.dialect.has_table(connection, "schema_migrations"):
+        return set()
+    rows = connection.execute(text("SELECT version FROM schema_migrations"))
+    return {version for version, in rows}
+
+
+def _record(connection, version):
+    connection.execute(
+        text("INSERT INTO schema_migrations (version) VALUES (:version)"),
+        version=version,
+    )
+
+
+def _run(connection, operation):
+    # index builds and backfills may run longer than requests are allowed to,
+    # the timeout is lifted only until pooled connection is handed back
+    postgres = connection.dialect.name == "postgresql"
+    if operation.transactional:
+        with connection.begin():
+            if postgres:
+                connection.execute(text("SET LOCAL statement_timeout = 0"))
+            operation.run(connection)
+        return
+
+    connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+    if not postgres:
+        operation.run(connection)
+        return
+    connection.execute(text("SET statement_timeout = 0"))
+    try:
+        operation.run(connection)
+    finally:
+        connection.execute(text("RESET statement_timeout"))
+
+
+def migrate(engine, dry_run=False, echo=print):
+    """Applies pending migrations.
+
+    Operations are applied one by one so that only transactional operations
+    share a transaction, online index builds and batched backfills run
+    outside of it. In dry run SQL statements and locks they take are printed
+    instead of being executed.
+
+    Returns:
+        migrations (list): pending migrations.
+    """
+    with engine.connect() as connection:
+        applied = applied_versions(connection)
+    pending = [
+        migration for migration in load_migrations() if migration.version not in applied
+    ]
+
+    for migration in pending:
+        echo(f"-- {migration.version} {migration.name}")
+        for operation in migration.operations:
+            with engine.connect() as connection:
+                echo(f"-- lock: {operation.lock_impact(engine.dialect.name)}")
+                for statement in operation.statements(connection):
+                    echo(f"{statement};")
+                if not dry_run:
+                    _run(connection, operation)
+
+        if not dry_run:
+            with engine.begin() as connection:
+                _ensure_versions_table(connection)
+                _record(connection, migration.version)
+
+    return pending
+
+
+def stamp(engine):
+    """Marks all migrations as applied to just created database."""
+    with engine.begin() as connection:
+        _ensure_versions_table(connection)
+        applied = applied_versions(connection)
+        for migration in load_migrations():
+            if migration.version not in applied:
+                _record(connection, migration.version)
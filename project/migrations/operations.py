@@ -0,0 +1,152 @@
+from sqlalchemy import inspect, schema, text
+
+
+class Operation:
+    """Schema change applied by migration.
+
+    Transactional operations of a migration run in a single transaction,
+    others manage transactions on their own.
+    """
+
+    transactional = True
+
+    def statements(self, connection):
+        """Returns SQL statements the operation would execute."""
+        raise NotImplementedError
+
+    def lock_impact(self, dialect):
+        """Describes locks held while the operation runs."""
+        raise NotImplementedError
+
+    def run(self, connection):
+        for statement in self.statements(connection):
+            connection.execute(text(statement))
+
+
+class CreateTables(Operation):
+    """Creates given tables and their indexes unless tables already exist.
+
+    Tables are declared by the migration itself rather than taken from
+    models, so that migration creates the same schema whenever it is applied.
+    """
+
+    def __init__(self, *tables):
+        self.tables = tables
+
+    def statements(self, connection):
+        existing = set(inspect(connection).get_table_names())
+        ddl = []
+        for table in self.tables:
+            if table.name in existing:
+                continue
+            ddl.append(schema.CreateTable(table))
+            indexes = sorted(table.indexes, key=lambda index: index.name)
+            ddl.extend(schema.CreateIndex(index) for index in indexes)
+        return [
+            str(element.compile(dialect=connection.dialect)).strip() for element in ddl
+        ]
+
+    def lock_impact(self, dialect):
+        return "none, only new tables are created"
+
+
+class AddColumn(Operation):
+    """Adds column unless table already has it.
+
+    Adding column with constant default does not rewrite the table on
+    PostgreSQL 11+, so exclusive lock is held only briefly.
+    """
+
+    def __init__(self, table, column, definition):
+        self.table = table
+        self.column = column
+        self.definition = definition
+
+    def statements(self, connection):
+        inspector = inspect(connection)
+        # table may be missing in dry run, before earlier migration created it
+        if self.table in inspector.get_table_names():
+            columns = inspector.get_columns(self.table)
+            if any(column["name"] == self.column for column in columns):
+                return []
+        return [f"ALTER TABLE {self.table} ADD COLUMN {self.column} {self.definition}"]
+
+    def lock_impact(self, dialect):
+        return f"ACCESS EXCLUSIVE on {self.table} for a moment, no table rewrite"
+
+
+class CreateIndex(Operation):
+    """Builds index without blocking writes to the table.
+
+    On PostgreSQL index is built with ``CREATE INDEX CONCURRENTLY`` which can
+    not run inside transaction. Invalid index left by interrupted build is
+    dropped before building it again.
+    """
+
+    transactional = False
+
+    def __init__(self, name, table, expressions, unique=False):
+        self.name = name
+        self.table = table
+        self.expressions = expressions
+        self.unique = unique
+
+    def statements(self, connection):
+        unique = "UNIQUE " if self.unique else ""
+        expressions = ", ".join(self.expressions)
+        if connection.dialect.name != "postgresql":
+            return [
+                f"CREATE {unique}INDEX IF NOT EXISTS {self.name} "
+                f"ON {self.table} ({expressions})"
+            ]
+
+        statements = []
+        invalid = connection.execute(
+            text(
+                "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = indexrelid "
+                "WHERE relname = :name AND NOT indisvalid"
+            ),
+            name=self.name,
+        ).scalar()
+        if invalid:
+            statements.append(f"DROP INDEX CONCURRENTLY IF EXISTS {self.name}")
+        statements.append(
+            f"CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {self.name} "
+            f"ON {self.table} ({expressions})"
+        )
+        return statements
+
+    def lock_impact(self, dialect):
+        if dialect == "postgresql":
+            return f"SHARE UPDATE EXCLUSIVE on {self.table}, writes are not blocked"
+        return f"writes to {self.table} are blocked until index is built"
+
+
+class Backfill(Operation):
+    """Updates rows matching condition in batches, each in own transaction."""
+
+    transactional = False
+
+    def __init__(self, table, assignments, condition, batch_size=10000):
+        self.table = table
+        self.assignments = assignments
+        self.condition = condition
+        self.batch_size = batch_size
+
+    def statements(self, connection):
+        return [
+            f"UPDATE {self.table} SET {self.assignments} WHERE id IN "
+            f"(SELECT id FROM {self.table} WHERE {self.condition} "
+            f"LIMIT {self.batch_size})"
+        ]
+
+    def lock_impact(self, dialect):
+        return (
+            f"ROW EXCLUSIVE on {self.table}, "
+            f"at most {self.batch_size} rows locked at once"
+        )
+
+    def run(self, connection):
+        (statement,) = self.statements(connection)
+        while connection.execute(text(statement)).rowcount:
+            pass
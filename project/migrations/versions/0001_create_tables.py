@@ -0,0 +1,43 @@
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    MetaData,
+    String,
+    Table,
+)
+
+from project.migrations.operations import CreateTables
+
+# schema as of this migration, later changes are made by later migrations
+metadata = MetaData()
+
+users = Table(
+    "users",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("username", String(128), nullable=False),
+    Column("email", String(128), nullable=False),
+    Column("password", String(255), nullable=False),
+    Column("active", Boolean(), nullable=False),
+    Column("created_date", DateTime, nullable=False),
+)
+
+refresh_tokens = Table(
+    "refresh_tokens",
+    metadata,
+    Column("jti", String(32), primary_key=True),
+    Column(
+        "user_id",
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    ),
+    Column("expires_at", DateTime, nullable=False, index=True),
+    Column("revoked", Boolean(), nullable=False),
+)
+
+operations = [CreateTables(users, refresh_tokens)]
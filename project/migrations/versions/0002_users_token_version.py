@@ -0,0 +1,3 @@
+from project.migrations.operations import AddColumn
+
+operations = [AddColumn("users", "token_version", "INTEGER NOT NULL DEFAULT 0")]
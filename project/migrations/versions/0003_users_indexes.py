@@ -0,0 +1,12 @@
+from project.migrations.operations import Backfill, CreateIndex
+
+operations = [
+    Backfill(
+        "users",
+        assignments="email = lower(trim(email))",
+        condition="email <> lower(trim(email))",
+    ),
+    CreateIndex("ix_users_created_date_id", "users", ["created_date", "id"]),
+    # fails if database already has users with the same email
+    CreateIndex("ix_users_email_lower", "users", ["lower(email)"], unique=True),
+]
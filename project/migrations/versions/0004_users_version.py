@@ -0,0 +1,12 @@
+from project.migrations.operations import AddColumn, Backfill
+
+operations = [
+    AddColumn("users", "version", "INTEGER NOT NULL DEFAULT 1"),
+    # SQLite can't add column with non-constant default, so it is backfilled
+    AddColumn("users", "updated_date", "TIMESTAMP"),
+    Backfill(
+        "users",
+        assignments="updated_date = created_date",
+        condition="updated_date IS NULL",
+    ),
+]
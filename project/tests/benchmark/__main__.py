@@ -0,0 +1,107 @@
+"""Runs HTTP benchmark of API endpoints.
+
+Usage::
+
+    python -m project.tests.benchmark --requests 1000 --concurrency 8 \
+        --output results.json --baseline previous.json --threshold 0.2
+
+Without ``--url`` requests are sent through WSGI interface of application
+configured by ``APP_SETTINGS``, e.g. against local PostgreSQL or SQLite file.
+"""
+import argparse
+import json
+import sys
+
+from project.tests.benchmark.harness import (
+    BENCH_EMAIL,
+    BENCH_PASSWORD,
+    BENCH_USERNAME,
+    SCENARIOS,
+    HTTPClient,
+    WSGIClient,
+    find_regressions,
+    run,
+)
+
+
+def wsgi_client_factory(create_tables):
+    from project import create_app, db
+    from project.api.users.crud import add_user, get_user_by_email
+
+    app = create_app()
+    with app.app_context():
+        if create_tables:
+            db.create_all()
+        if not get_user_by_email(BENCH_EMAIL):
+            add_user(BENCH_USERNAME, BENCH_EMAIL, BENCH_PASSWORD)
+        db.session.remove()
+
+    return lambda: WSGIClient(app)
+
+
+def http_client_factory(url):
+    HTTPClient(url).request(
+        "POST",
+        "/auth/register",
+        {"username": BENCH_USERNAME, "email": BENCH_EMAIL, "password": BENCH_PASSWORD},
+    )
+    return lambda: HTTPClient(url)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks API endpoints.")
+    parser.add_argument("--url", help="base URL of running server")
+    parser.add_argument("--create-tables", action="store_true")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--scenarios", default=",".join(SCENARIOS), help="comma separated names"
+    )
+    parser.add_argument("--output", help="file to store JSON results in")
+    parser.add_argument("--baseline", help="JSON results of previous run")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument(
+        "--metric", default="p95", choices=["mean", "p50", "p95", "p99"]
+    )
+    args = parser.parse_args(argv)
+
+    if args.url:
+        client_factory = http_client_factory(args.url)
+    else:
+        client_factory = wsgi_client_factory(args.create_tables)
+
+    report = run(
+        client_factory, args.scenarios.split(","), args.requests, args.concurrency
+    )
+
+    print(
+        f"{'scenario':<14}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>8}"
+    )
+    for scenario, result in report["results"].items():
+        print(
+            f"{scenario:<14}{result['throughput']:>10.1f}{result['p50']:>10.2f}"
+            f"{result['p95']:>10.2f}{result['p99']:>10.2f}{result['errors']:>8}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = find_regressions(
+                report, json.load(baseline), args.threshold, args.metric
+            )
+        for scenario, previous, current in regressions:
+            print(
+                f"{scenario} regressed: "
+                f"{args.metric} {previous:.2f}ms -> {current:.2f}ms"
+            )
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
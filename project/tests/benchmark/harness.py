@@ -0,0 +1,192 @@
+import datetime
+import json
+import math
+import threading
+import time
+import urllib.error
+import urllib.request
+
+BENCH_USERNAME = "bench"
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "bench-password"
+
+
+class Response:
+    """Status code and decoded JSON body of a response"""
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+
+class WSGIClient:
+    """Sends requests straight to WSGI application through Flask test client."""
+
+    def __init__(self, app):
+        self._client = app.test_client()
+
+    def request(self, method, path, payload=None, headers=None):
+        response = self._client.open(
+            path,
+            method=method,
+            data=json.dumps(payload) if payload is not None else None,
+            content_type="application/json",
+            headers=headers,
+        )
+        return Response(response.status_code, response.get_data())
+
+
+class HTTPClient:
+    """Sends requests to running server, e.g. local gunicorn."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, path, payload=None, headers=None):
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=json.dumps(payload).encode() if payload is not None else None,
+            headers={"Content-Type": "application/json", **(headers or {})},
+            method=method,
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return Response(response.status, response.read())
+        except urllib.error.HTTPError as error:
+            return Response(error.code, error.read())
+
+
+def _login(client, state):
+    response = client.request(
+        "POST", "/auth/login", {"email": BENCH_EMAIL, "password": BENCH_PASSWORD}
+    )
+    state.update(response.json() or {})
+    return response
+
+
+def _ensure_login(client, state):
+    if "access_token" not in state:
+        _login(client, state)
+
+
+def _users_detail(client, state):
+    if "user_id" not in state:
+        state["user_id"] = client.request("GET", "/users?limit=1").json()[0]["id"]
+    return client.request("GET", f"/users/{state['user_id']}")
+
+
+def _refresh(client, state):
+    _ensure_login(client, state)
+    response = client.request(
+        "POST", "/auth/refresh", {"refresh_token": state["refresh_token"]}
+    )
+    # refresh token is exchanged only once, next request uses the new one
+    state.update(response.json() or {})
+    return response
+
+
+def _status(client, state):
+    _ensure_login(client, state)
+    headers = {"Authorization": f"Bearer {state['access_token']}"}
+    return client.request("GET", "/auth/status", headers=headers)
+
+
+SCENARIOS = {
+    "ping": lambda client, state: client.request("GET", "/ping"),
+    "users_list": lambda client, state: client.request("GET", "/users"),
+    "users_detail": _users_detail,
+    "login": _login,
+    "refresh": _refresh,
+    "status": _status,
+}
+
+
+def percentile(values, fraction):
+    """Returns nearest-rank percentile of sorted values."""
+    if not values:
+        return None
+    return values[max(math.ceil(fraction * len(values)) - 1, 0)]
+
+
+def summarize(durations, errors, elapsed):
+    """Returns throughput and latency percentiles in milliseconds."""
+    durations = sorted(durations)
+    return {
+        "requests": len(durations),
+        "errors": errors,
+        "throughput": len(durations) / elapsed if elapsed else 0,
+        "mean": 1000 * sum(durations) / len(durations) if durations else None,
+        "p50": 1000 * percentile(durations, 0.5) if durations else None,
+        "p95": 1000 * percentile(durations, 0.95) if durations else None,
+        "p99": 1000 * percentile(durations, 0.99) if durations else None,
+    }
+
+
+def run_scenario(client_factory, scenario, requests, concurrency):
+    """Sends ``requests`` requests of the scenario from ``concurrency`` threads.
+
+    Every thread has its own client and state, e.g. tokens of logged in user.
+    Requests answered with status code 400 or higher are counted as errors.
+    """
+    send = SCENARIOS[scenario]
+    durations = []
+    errors = [0]
+    lock = threading.Lock()
+    per_thread = [requests // concurrency] * concurrency
+    for index in range(requests % concurrency):
+        per_thread[index] += 1
+
+    def worker(count):
+        client = client_factory()
+        state = {}
+        # warm up thread state outside of measured requests
+        send(client, state)
+        for _ in range(count):
+            started = time.perf_counter()
+            response = send(client, state)
+            duration = time.perf_counter() - started
+            with lock:
+                durations.append(duration)
+                if response.status_code >= 400:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=worker, args=(count,)) for count in per_thread]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return summarize(durations, errors[0], time.perf_counter() - started)
+
+
+def run(client_factory, scenarios, requests, concurrency):
+    """Runs scenarios one after another and returns JSON serializable report."""
+    return {
+        "created": datetime.datetime.utcnow().isoformat(),
+        "requests": requests,
+        "concurrency": concurrency,
+        "results": {
+            scenario: run_scenario(client_factory, scenario, requests, concurrency)
+            for scenario in scenarios
+        },
+    }
+
+
+def find_regressions(report, baseline, threshold, metric="p95"):
+    """Compares latency metric of every scenario with baseline report.
+
+    Returns:
+        list: ``(scenario, baseline value, current value)`` of scenarios
+            slower than baseline by more than ``threshold`` fraction.
+    """
+    regressions = []
+    for scenario, result in report["results"].items():
+        previous = baseline["results"].get(scenario, {}).get(metric)
+        current = result.get(metric)
+        if previous and current and current > previous * (1 + threshold):
+            regressions.append((scenario, previous, current))
+    return regressions
@@ -0,0 +1,78 @@
+"""Measures encoding of ``/users`` responses with every JSON backend.
+
+Usage::
+
+    python -m project.tests.benchmark.json_encoding --sizes 100,1000,10000
+"""
+import argparse
+import datetime
+import sys
+import time
+
+from flask import Flask
+
+from project.api import representations
+from project.config import BaseConfig
+
+
+def users_page(size):
+    """Returns serialized page of users as sent by ``GET /users``."""
+    created_date = datetime.datetime(2020, 1, 1, 12, 30, 15, 123456)
+    return [
+        {
+            "id": index,
+            "username": f"user{index}",
+            "email": f"user{index}@example.com",
+            "created_date": (
+                created_date + datetime.timedelta(seconds=index)
+            ).isoformat(),
+        }
+        for index in range(size)
+    ]
+
+
+def measure(sizes, repeat=20):
+    """Returns best time of encoding response in ms by backend and size."""
+    app = Flask(__name__)
+    app.config.from_object(BaseConfig)
+    results = {}
+    with app.app_context():
+        for backend in ("stdlib", "orjson"):
+            if backend == "orjson" and representations.orjson is None:
+                continue
+            app.config["JSON_BACKEND"] = backend
+            results[backend] = {}
+            for size in sizes:
+                data = users_page(size)
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    representations.output_json(data, 200)
+                    timings.append(time.perf_counter() - started)
+                results[backend][size] = min(timings) * 1000
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks JSON encoding.")
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = measure(sizes, args.repeat)
+
+    print(f"{'rows':>8}{'stdlib':>12}{'orjson':>12}{'speedup':>10}")
+    for size in sizes:
+        stdlib = results["stdlib"][size]
+        orjson = results.get("orjson", {}).get(size)
+        if orjson is None:
+            print(f"{size:>8}{stdlib:>12.3f}{'-':>12}{'-':>10}")
+        else:
+            print(f"{size:>8}{stdlib:>12.3f}{orjson:>12.3f}{stdlib / orjson:>9.1f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,10 @@ import json
 
 import pytest
 
+from project.api.users.crud import get_user_by_email, update_user
+from project.api.users.models import User
+from project.hashing import get_rounds
+
 
 def test_register(test_app, test_database, create_payload):
     username = "test"
@@ -77,6 +81,26 @@ def test_registered_login(test_app, test_database, create_payload, add_user):
     assert data["refresh_token"]
 
 
+def test_login_rehashes_password(
+    test_app, test_database, create_payload, add_user, monkeypatch
+):
+    email = "test@example.com"
+    password = "test12345"
+    user = add_user("test", email, password)
+    assert get_rounds(user.password) == 4
+
+    monkeypatch.setitem(test_app.config, "BCRYPT_LOG_ROUNDS", 5)
+    client = test_app.test_client()
+    response = client.post(
+        "/auth/login", **create_payload(email=email, password=password)
+    )
+
+    assert response.status_code == 200
+    user = get_user_by_email(email)
+    assert get_rounds(user.password) == 5
+    assert user.check_password(password)
+
+
 def test_not_registered_login(test_app, test_database, create_payload):
     email = "test@example.com"
     password = "test12345"
@@ -140,6 +164,36 @@ def test_valid_refresh(test_app, test_database, create_payload, add_user):
     assert data["refresh_token"]
 
 
+def test_reused_refresh(test_app, test_database, create_payload, add_user):
+    email = "test@example.com"
+    password = "test12345"
+
+    add_user(username="test", email=email, password=password)
+
+    client = test_app.test_client()
+
+    login_response = client.post(
+        "/auth/login", **create_payload(email=email, password=password)
+    )
+    refresh_token = json.loads(login_response.data.decode())["refresh_token"]
+
+    response1 = client.post(
+        "/auth/refresh", **create_payload(refresh_token=refresh_token)
+    )
+    rotated_refresh_token = json.loads(response1.data.decode())["refresh_token"]
+    response2 = client.post(
+        "/auth/refresh", **create_payload(refresh_token=refresh_token)
+    )
+    response3 = client.post(
+        "/auth/refresh", **create_payload(refresh_token=rotated_refresh_token)
+    )
+
+    assert response1.status_code == 200
+    assert response2.status_code == 401
+    assert response3.status_code == 401
+    assert "invalid token" in json.loads(response3.data.decode())["message"].lower()
+
+
 def test_invalid_refresh(test_app, test_database, create_payload):
     client = test_app.test_client()
 
@@ -215,3 +269,62 @@ def test_user_status_with_invalid_token(test_app, test_database, create_payload)
 
     assert response.status_code == 401
     assert "invalid token" in data["message"].lower()
+
+
+def test_user_status_from_claims(test_app, test_database, create_payload, add_user):
+    user = add_user(username="test", email="test@example.com")
+    access_token = User.encode_token(user.id, "access", user.token_claims()).decode()
+    # changed without bumping token version, so claims are still current
+    User.query.filter_by(id=user.id).update({"username": "renamed"})
+    test_database.session.commit()
+
+    client = test_app.test_client()
+    response = client.get("/auth/status", **create_payload(auth_token=access_token))
+    data = json.loads(response.data.decode())
+
+    assert response.status_code == 200
+    assert data["username"] == "test"
+    assert data["email"] == "test@example.com"
+
+
+def test_user_status_of_deleted_user(test_app, test_database, create_payload, add_user):
+    user = add_user(username="test", email="test@example.com")
+    access_token = User.encode_token(user.id, "access", user.token_claims()).decode()
+    test_database.session.delete(user)
+    test_database.session.commit()
+
+    client = test_app.test_client()
+    response = client.get("/auth/status", **create_payload(auth_token=access_token))
+    data = json.loads(response.data.decode())
+
+    assert response.status_code == 401
+    assert "invalid token" in data["message"].lower()
+
+
+def test_user_status_without_claims(test_app, test_database, create_payload, add_user):
+    user = add_user(username="test", email="test@example.com")
+    access_token = User.encode_token(user.id, "access").decode()
+    update_user(user, "renamed", "test@example.com")
+
+    client = test_app.test_client()
+    response = client.get("/auth/status", **create_payload(auth_token=access_token))
+    data = json.loads(response.data.decode())
+
+    assert response.status_code == 200
+    assert data["username"] == "renamed"
+
+
+def test_user_status_with_stale_claims(
+    test_app, test_database, create_payload, add_user, monkeypatch
+):
+    monkeypatch.setitem(test_app.config, "AUTH_STATUS_VERIFY_DB", True)
+    user = add_user(username="test", email="test@example.com")
+    access_token = User.encode_token(user.id, "access", user.token_claims()).decode()
+    update_user(user, "renamed", "test@example.com")
+
+    client = test_app.test_client()
+    response = client.get("/auth/status", **create_payload(auth_token=access_token))
+    data = json.loads(response.data.decode())
+
+    assert response.status_code == 401
+    assert "invalid token" in data["message"].lower()
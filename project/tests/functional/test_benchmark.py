@@ -0,0 +1,20 @@
+from project.tests.benchmark.harness import (
+    BENCH_EMAIL,
+    BENCH_PASSWORD,
+    BENCH_USERNAME,
+    SCENARIOS,
+    WSGIClient,
+    run,
+)
+
+
+def test_benchmark_scenarios(test_app, test_database, add_user):
+    add_user(BENCH_USERNAME, BENCH_EMAIL, BENCH_PASSWORD)
+
+    report = run(lambda: WSGIClient(test_app), list(SCENARIOS), 6, 2)
+
+    assert set(report["results"]) == set(SCENARIOS)
+    for result in report["results"].values():
+        assert result["requests"] == 6
+        assert result["errors"] == 0
+        assert result["p50"] <= result["p95"] <= result["p99"]
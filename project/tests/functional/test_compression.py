@@ -0,0 +1,95 @@
+import gzip
+import json
+
+from project import compress
+from project.api import api
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+def add_users(add_user, count):
+    for index in range(count):
+        add_user(f"user{index}", f"user{index}@example.com")
+
+
+def test_compress_users(test_app, test_database, add_user):
+    add_users(add_user, 20)
+
+    client = test_app.test_client()
+    plain = client.get("/users")
+    response = client.get("/users", headers=GZIP)
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert gzip.decompress(response.data) == plain.data
+    assert "Content-Encoding" not in plain.headers
+    assert response.headers["ETag"].startswith("W/")
+
+    etag = response.headers["ETag"]
+    response = client.get("/users", headers={**GZIP, "If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_compress_small_response(test_app):
+    client = test_app.test_client()
+    response = client.get("/ping", headers=GZIP)
+
+    assert "Content-Encoding" not in response.headers
+
+
+def test_compress_disabled(test_app, test_database, add_user, monkeypatch):
+    monkeypatch.setitem(test_app.config, "COMPRESS_ENABLED", False)
+    add_users(add_user, 20)
+
+    client = test_app.test_client()
+    response = client.get("/users", headers=GZIP)
+
+    assert "Content-Encoding" not in response.headers
+
+
+def test_compress_stream(test_app, test_database, add_user):
+    add_users(add_user, 3)
+
+    client = test_app.test_client()
+    response = client.get("/users/export", headers=GZIP)
+    lines = gzip.decompress(response.data).decode().splitlines()
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert [json.loads(line)["username"] for line in lines] == [
+        "user0",
+        "user1",
+        "user2",
+    ]
+
+
+def test_swagger_spec_frozen(test_app):
+    client = test_app.test_client()
+    response = client.get("/swagger.json", headers=GZIP)
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.data)) == json.loads(
+        json.dumps(api.__schema__)
+    )
+
+    etag = response.headers["ETag"]
+    response = client.get("/swagger.json", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    response = client.get("/swagger.json")
+    assert "Content-Encoding" not in response.headers
+    assert json.loads(response.data)["info"]["title"] == "Users API"
+
+
+def test_swagger_assets_compressed_once(test_app):
+    client = test_app.test_client()
+    url = "/swaggerui/swagger-ui-bundle.js"
+    plain = client.get(url)
+    first = client.get(url, headers=GZIP)
+    cached = len(compress._files)
+    second = client.get(url, headers=GZIP)
+
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(first.data) == plain.data
+    assert second.data == first.data
+    assert len(compress._files) == cached
+    plain.close()
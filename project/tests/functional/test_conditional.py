@@ -0,0 +1,140 @@
+import datetime
+
+import pytest
+from sqlalchemy import select, text
+from werkzeug.http import http_date, parse_date
+
+from project.api.users.crud import (
+    delete_user,
+    get_users_page,
+    get_users_page_state,
+    update_user,
+)
+from project.database import utcnow
+
+
+def test_get_user_not_modified(test_app, test_database, add_user):
+    user = add_user("joe", "joe@example.com")
+
+    client = test_app.test_client()
+    response = client.get(f"/users/{user.id}")
+    etag = response.headers["ETag"]
+
+    assert response.status_code == 200
+    assert "Last-Modified" in response.headers
+
+    response = client.get(f"/users/{user.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response.headers["ETag"] == etag
+
+    update_user(user, "joe", "joe@example.org")
+    response = client.get(f"/users/{user.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_get_user_if_modified_since(test_app, test_database, add_user):
+    user = add_user("joe", "joe@example.com")
+    future = http_date(datetime.datetime.utcnow() + datetime.timedelta(days=1))
+    past = http_date(datetime.datetime(2000, 1, 1))
+
+    client = test_app.test_client()
+    url = f"/users/{user.id}"
+    assert client.get(url, headers={"If-Modified-Since": future}).status_code == 304
+    assert client.get(url, headers={"If-Modified-Since": past}).status_code == 200
+
+
+def test_get_users_not_modified(test_app, test_database, add_user):
+    add_user("joe", "joe@example.com")
+    jane = add_user("jane", "jane@example.com")
+
+    client = test_app.test_client()
+    etag = client.get("/users").headers["ETag"]
+
+    response = client.get("/users", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    # other pages have other tags
+    response = client.get("/users?limit=1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+    update_user(jane, "jane", "jane@example.org")
+    response = client.get("/users", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    add_user("john", "john@example.com")
+    response = client.get("/users", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+
+def test_get_users_after_delete(test_app, test_database, add_user):
+    joe = add_user("joe", "joe@example.com")
+    add_user("jane", "jane@example.com")
+
+    client = test_app.test_client()
+    response = client.get("/users")
+    etag = response.headers["ETag"]
+    assert "Last-Modified" not in response.headers
+
+    delete_user(joe)
+    future = http_date(datetime.datetime.utcnow() + datetime.timedelta(days=1))
+    response = client.get("/users", headers={"If-Modified-Since": future})
+    assert response.status_code == 200
+    response = client.get("/users", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+
+def test_users_page_state_of_rows(test_app, test_database, add_user):
+    assert get_users_page(2)[2] == get_users_page_state(2)
+
+    add_user("joe", "joe@example.com")
+    jane = add_user("jane", "jane@example.com")
+    add_user("jack", "jack@example.com")
+    update_user(jane, "jane", "jane@example.org")
+
+    for limit in (1, 2, 3):
+        users, next_cursor, state = get_users_page(limit)
+        assert state == get_users_page_state(limit)
+        assert get_users_page(limit, next_cursor)[2] == get_users_page_state(
+            limit, next_cursor
+        )
+
+
+@pytest.mark.parametrize("url", ["/users", "/users/{id}"])
+def test_etag_depends_on_fields_mask(test_app, test_database, add_user, url):
+    user = add_user("joe", "joe@example.com")
+    url = url.format(id=user.id)
+
+    client = test_app.test_client()
+    response = client.get(url)
+    etag = response.headers["ETag"]
+    masked = client.get(url, headers={"X-Fields": "email"})
+
+    assert "X-Fields" in response.headers["Vary"]
+    assert "X-Fields" in masked.headers["Vary"]
+    assert masked.headers["ETag"] != etag
+    response = client.get(url, headers={"X-Fields": "email", "If-None-Match": etag})
+    assert response.status_code == 200
+    response = client.get(
+        url, headers={"X-Fields": "email", "If-None-Match": masked.headers["ETag"]}
+    )
+    assert response.status_code == 304
+
+
+def test_last_modified_in_utc(test_app, test_database, add_user):
+    if test_database.engine.dialect.name == "postgresql":
+        with test_database.engine.begin() as connection:
+            connection.execute(text("SET LOCAL TIME ZONE 'Asia/Tokyo'"))
+            now = connection.execute(select([utcnow()])).scalar()
+        assert abs(now - datetime.datetime.utcnow()) < datetime.timedelta(minutes=1)
+
+    user = add_user("joe", "joe@example.com")
+    client = test_app.test_client()
+    response = client.get(f"/users/{user.id}")
+    last_modified = parse_date(response.headers["Last-Modified"])
+
+    assert abs(last_modified - datetime.datetime.utcnow()) < datetime.timedelta(
+        minutes=1
+    )
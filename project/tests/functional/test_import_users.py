@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from project import db
+from project.api.users.crud import get_user_by_email
+from project.api.users.importer import import_users
+
+PW_HASH = "$2b$04$" + "a" * 53
+
+
+@pytest.fixture(scope="function")
+def postgres_database(test_app, test_database):
+    if db.engine.dialect.name != "postgresql":
+        pytest.skip("COPY requires PostgreSQL database")
+    return test_database
+
+
+def test_import_users(test_app, postgres_database, add_user, tmp_path):
+    add_user("joe", "joe@example.com")
+    path = tmp_path / "users.csv"
+    path.write_text(
+        "username,email,password\n"
+        f"jane,Jane@example.com,{PW_HASH}\n"
+        f"joe,joe@example.com,{PW_HASH}\n"
+        f"jane,jane@example.com,{PW_HASH}\n"
+        "jack,jack@example.com,plain\n"
+    )
+
+    stats = import_users(str(path), echo=lambda line: None)
+
+    assert stats == {"copied": 3, "inserted": 1, "rejected": 1}
+    assert get_user_by_email("jane@example.com").password == PW_HASH
+
+
+def test_import_users_skips_bad_lines(test_app, postgres_database, tmp_path):
+    path = tmp_path / "users.ndjson"
+    path.write_text(
+        "\n".join(
+            [
+                json.dumps({"username": "joe", "email": "joe@x.com", "password": 1}),
+                "not json",
+                json.dumps(
+                    {"username": "jane", "email": "jane@x.com", "password": PW_HASH}
+                ),
+            ]
+        )
+    )
+    lines = []
+
+    stats = import_users(str(path), echo=lines.append)
+
+    assert stats == {"copied": 1, "inserted": 1, "rejected": 2}
+    assert "line 1 skipped: password is missing or not a string" in lines
+    assert "line 2 skipped: malformed line" in lines
+    assert get_user_by_email("jane@x.com").password == PW_HASH
@@ -0,0 +1,130 @@
+import json
+import os
+
+from project import metrics
+from project.metrics import mark_process_dead
+
+
+def parse_metrics(text):
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_metrics(test_app):
+    client = test_app.test_client()
+    before = parse_metrics(client.get("/metrics").data.decode())
+    client.get("/ping")
+    client.get("/ping")
+    response = client.get("/metrics")
+    after = parse_metrics(response.data.decode())
+
+    labels = 'endpoint="ping_ping",method="GET",status="200"'
+    requests = f"http_requests_total{{{labels}}}"
+    count = f"http_request_duration_seconds_count{{{labels}}}"
+    bucket = f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert "# TYPE http_request_duration_seconds histogram" in response.data.decode()
+    assert after[requests] - before.get(requests, 0) == 2
+    assert after[count] - before.get(count, 0) == 2
+    assert after[bucket] == after[count]
+    assert after["bcrypt_queue_depth"] == 0
+
+
+def test_metrics_cache_hit_ratio(test_app, test_database, add_user, monkeypatch):
+    monkeypatch.setitem(test_app.config, "CACHE_ENABLED", True)
+    user = add_user("joe", "joe@example.com")
+
+    client = test_app.test_client()
+    client.get(f"/users/{user.id}")
+    client.get(f"/users/{user.id}")
+    text = client.get("/metrics").data.decode()
+    samples = parse_metrics(text)
+
+    assert 0 < samples["cache_hit_ratio"] <= 1
+    assert samples["cache_lookups"] >= 2
+    assert "# TYPE cache_lookups counter" in text
+
+
+def test_metrics_multiprocess(test_app, tmp_path, monkeypatch):
+    monkeypatch.setitem(test_app.config, "METRICS_MULTIPROC_DIR", str(tmp_path))
+    monkeypatch.setitem(test_app.config, "METRICS_FLUSH_INTERVAL", 0)
+    labels = [["endpoint", "ping_ping"], ["method", "GET"], ["status", "200"]]
+    for pid, queue_depth in [(os.getppid(), 2), (2**22 + 1, 5)]:
+        snapshot = {
+            "counters": [["http_requests_total", labels, 10]],
+            "histograms": [],
+            "gauges": [["bcrypt_queue_depth", [], queue_depth]],
+        }
+        (tmp_path / f"metrics_{pid}.json").write_text(json.dumps(snapshot))
+
+    client = test_app.test_client()
+    before = parse_metrics(client.get("/metrics").data.decode())
+    client.get("/ping")
+    after = parse_metrics(client.get("/metrics").data.decode())
+
+    requests = 'http_requests_total{endpoint="ping_ping",method="GET",status="200"}'
+    assert after[requests] - before[requests] == 1
+    assert after[requests] >= 21
+    # gauges of exited processes are dropped
+    assert after["bcrypt_queue_depth"] == 2
+    assert (tmp_path / f"metrics_{os.getpid()}.json").exists()
+
+    monkeypatch.setitem(test_app.config, "METRICS_MULTIPROC_DIR", None)
+    assert parse_metrics(metrics.render())[requests] == after[requests] - 20
+
+
+def test_metrics_of_exited_processes_archived(test_app, tmp_path, monkeypatch):
+    labels = [["endpoint", "ping_ping"], ["method", "GET"], ["status", "200"]]
+    buckets = len(test_app.config["METRICS_BUCKETS"]) + 1
+    pid = 2**22 + 1
+
+    def dump(count):
+        snapshot = {
+            "counters": [["http_requests_total", labels, count]],
+            "histograms": [
+                [
+                    "http_request_duration_seconds",
+                    labels,
+                    [count] + [0] * (buckets - 1),
+                    0.001 * count,
+                    count,
+                ]
+            ],
+            "gauges": [["bcrypt_queue_depth", [], 5]],
+        }
+        (tmp_path / f"metrics_{pid}.json").write_text(json.dumps(snapshot))
+
+    dump(10)
+    mark_process_dead(pid, str(tmp_path))
+    # pid reused by another worker
+    dump(3)
+    mark_process_dead(pid, str(tmp_path))
+
+    assert [path.name for path in tmp_path.glob("metrics_*.json")] == [
+        "metrics_archive.json"
+    ]
+
+    own = parse_metrics(metrics.render())
+    monkeypatch.setitem(test_app.config, "METRICS_MULTIPROC_DIR", str(tmp_path))
+    merged = parse_metrics(metrics.render())
+
+    requests = 'http_requests_total{endpoint="ping_ping",method="GET",status="200"}'
+    count = (
+        "http_request_duration_seconds_count"
+        '{endpoint="ping_ping",method="GET",status="200"}'
+    )
+    assert merged[requests] - own.get(requests, 0) == 13
+    assert merged[count] - own.get(count, 0) == 13
+    assert merged["bcrypt_queue_depth"] == own["bcrypt_queue_depth"]
+
+
+def test_metrics_engine_info(test_app):
+    client = test_app.test_client()
+    response = client.get("/metrics")
+
+    assert "db_engine_info{" in response.data.decode()
@@ -0,0 +1,125 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
+
+from project import db
+from project.migrations import applied_versions, load_migrations, migrate, stamp
+
+
+@pytest.fixture(scope="function")
+def empty_database(test_app):
+    """Entry point for testing migrations against database without tables"""
+    db.session.remove()
+    db.drop_all()
+    yield db.engine
+    db.drop_all()
+    with db.engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS schema_migrations"))
+
+
+def test_migrate(test_app, empty_database):
+    pending = migrate(empty_database, echo=lambda line: None)
+
+    inspector = inspect(empty_database)
+    with empty_database.connect() as connection:
+        applied = applied_versions(connection)
+
+    assert [migration.version for migration in pending] == sorted(applied)
+    assert {"users", "refresh_tokens"} <= set(inspector.get_table_names())
+    assert "ix_users_created_date_id" in {
+        index["name"] for index in inspector.get_indexes("users")
+    }
+    assert migrate(empty_database, echo=lambda line: None) == []
+
+
+def test_migrate_restores_statement_timeout(test_app, empty_database):
+    if empty_database.dialect.name != "postgresql":
+        pytest.skip("statement timeout is specific to PostgreSQL")
+    # single connection, so the one used by migrations is checked below
+    engine = create_engine(
+        empty_database.url,
+        poolclass=StaticPool,
+        connect_args={"options": "-c statement_timeout=5000"},
+    )
+
+    migrate(engine, echo=lambda line: None)
+
+    with engine.connect() as connection:
+        timeout = connection.execute(text("SHOW statement_timeout")).scalar()
+    engine.dispose()
+    assert timeout == "5s"
+
+
+def test_migrate_dry_run(test_app, empty_database):
+    lines = []
+
+    pending = migrate(empty_database, dry_run=True, echo=lines.append)
+
+    assert pending
+    create_users = next(line for line in lines if line.startswith("CREATE TABLE users"))
+    assert "password VARCHAR(255) NOT NULL" in create_users
+    assert "token_version" not in create_users
+    assert any(
+        line.startswith("CREATE INDEX ix_refresh_tokens_user_id") for line in lines
+    )
+    assert "ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0;" in (
+        lines
+    )
+    assert any(line.startswith("-- lock:") for line in lines)
+    assert "users" not in inspect(empty_database).get_table_names()
+
+
+def test_migrate_creates_schema_of_models(test_app, empty_database):
+    migrate(empty_database, echo=lambda line: None)
+    migrated = inspect(empty_database)
+    migrated = {
+        table: {column["name"] for column in migrated.get_columns(table)}
+        for table in ("users", "refresh_tokens")
+    }
+    db.drop_all()
+
+    db.create_all()
+    created = inspect(empty_database)
+    assert migrated == {
+        table: {column["name"] for column in created.get_columns(table)}
+        for table in ("users", "refresh_tokens")
+    }
+
+
+def test_migrate_existing_table(test_app, empty_database):
+    with empty_database.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE users (id INTEGER PRIMARY KEY, "
+                "username VARCHAR(128) NOT NULL, email VARCHAR(128) NOT NULL, "
+                "password VARCHAR(255) NOT NULL, active BOOLEAN NOT NULL, "
+                "created_date TIMESTAMP NOT NULL)"
+            )
+        )
+        connection.execute(
+            text(
+                "INSERT INTO users "
+                "(id, username, email, password, active, created_date) "
+                "VALUES (1, 'joe', ' Joe@Example.com', 'x', true, CURRENT_TIMESTAMP)"
+            )
+        )
+
+    migrate(empty_database, echo=lambda line: None)
+
+    with empty_database.connect() as connection:
+        row = connection.execute(
+            text(
+                "SELECT email, token_version, version, "
+                "updated_date = created_date FROM users"
+            )
+        ).first()
+    assert tuple(row) == ("joe@example.com", 0, 1, True)
+
+
+def test_stamp(test_app, empty_database):
+    db.create_all()
+    stamp(empty_database)
+
+    with empty_database.connect() as connection:
+        applied = applied_versions(connection)
+    assert applied == {migration.version for migration in load_migrations()}
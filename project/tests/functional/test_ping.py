@@ -1,5 +1,10 @@
 import json
 
+import pytest
+
+import project.api.ping.views
+from project.api.ping.views import Readiness, readiness
+
 
 def test_ping(test_app):
     client = test_app.test_client()
@@ -8,3 +13,83 @@ def test_ping(test_app):
     assert response.status_code == 200
     assert "pong" in data["message"]
     assert "success" in data["status"]
+
+
+def test_ping_live(test_app):
+    client = test_app.test_client()
+    response = client.get("/ping/live")
+    data = json.loads(response.data.decode())
+    assert response.status_code == 200
+    assert data["status"] == "success"
+
+
+def test_ping_ready(test_app):
+    readiness.reset()
+    client = test_app.test_client()
+    response = client.get("/ping/ready")
+    data = json.loads(response.data.decode())
+    assert response.status_code == 200
+    assert data["status"] == "success"
+    assert data["checks"]["database"]["status"] == "success"
+    assert data["checks"]["database"]["latency_ms"] >= 0
+    assert data["checks"]["pool"]["status"] == "success"
+
+
+def test_ping_ready_database_down(test_app, monkeypatch, caplog):
+    class Engine:
+        def connect(self):
+            raise OSError("connection refused to 10.0.0.1")
+
+    readiness.reset()
+    monkeypatch.setattr(
+        project.api.ping.views, "probe_engine", lambda engine, timeout: Engine()
+    )
+    client = test_app.test_client()
+    response = client.get("/ping/ready")
+    data = json.loads(response.data.decode())
+    assert response.status_code == 503
+    assert data["status"] == "fail"
+    assert data["checks"]["database"]["message"] == "database check failed"
+    assert "10.0.0.1" in caplog.text
+
+
+def test_ping_ready_pool_exhausted(test_app, monkeypatch):
+    monkeypatch.setitem(test_app.config, "READINESS_MIN_POOL_HEADROOM", 10**6)
+
+    readiness.reset()
+    data, status_code = readiness.check()
+
+    if data["checks"]["pool"]["status"] == "success":
+        pytest.skip("pool of the database does not limit connections")
+    assert status_code == 503
+    assert data["checks"]["pool"]["message"] == "Connection pool is exhausted"
+
+
+def test_ping_ready_not_blocked_by_running_check(test_app, monkeypatch):
+    monkeypatch.setitem(test_app.config, "READINESS_CACHE_TTL", 0)
+    readiness.reset()
+    previous = readiness.check()
+    concurrent = []
+    monkeypatch.setitem(
+        Readiness.checks, "database", lambda: concurrent.append(readiness.check()) or {}
+    )
+
+    readiness.check()
+
+    assert concurrent == [previous]
+
+
+def test_ping_ready_cached(test_app, monkeypatch):
+    calls = []
+    monkeypatch.setitem(test_app.config, "READINESS_CACHE_TTL", 60)
+    monkeypatch.setitem(Readiness.checks, "database", lambda: calls.append(1) or {})
+
+    readiness.reset()
+    client = test_app.test_client()
+    client.get("/ping/ready")
+    client.get("/ping/ready")
+    assert len(calls) == 1
+
+    readiness.reset()
+    client.get("/ping/ready")
+    assert len(calls) == 2
@@ -0,0 +1,56 @@
+import datetime
+
+from project.api.auth.crud import (
+    create_refresh_token,
+    purge_expired_refresh_tokens,
+    revoke_user_refresh_tokens,
+    use_refresh_token,
+)
+from project.api.auth.models import RefreshToken
+from project.api.users.crud import get_user_by_id
+
+
+def test_use_refresh_token(test_app, test_database, add_user):
+    user = add_user("joe", "joe@example.com")
+    jti = create_refresh_token(user.id)
+
+    assert use_refresh_token(jti) == user.id
+    assert use_refresh_token(jti) is None
+
+
+def test_use_unknown_refresh_token(test_app, test_database):
+    assert use_refresh_token("unknown") is None
+
+
+def test_reused_refresh_token_revokes_all(test_app, test_database, add_user):
+    user = add_user("joe", "joe@example.com")
+    jti1 = create_refresh_token(user.id)
+    jti2 = create_refresh_token(user.id)
+
+    assert use_refresh_token(jti1) == user.id
+    assert use_refresh_token(jti1) is None
+    assert use_refresh_token(jti2) is None
+
+
+def test_revoke_user_refresh_tokens(test_app, test_database, add_user):
+    user = add_user("joe", "joe@example.com")
+    user_id = user.id
+    jti = create_refresh_token(user_id)
+
+    revoke_user_refresh_tokens(user_id)
+
+    assert get_user_by_id(user_id).token_version == 1
+    assert use_refresh_token(jti) is None
+
+
+def test_purge_expired_refresh_tokens(test_app, test_database, add_user):
+    user = add_user("joe", "joe@example.com")
+    active_jti = create_refresh_token(user.id)
+    for _ in range(3):
+        jti = create_refresh_token(user.id)
+        token = test_database.session.query(RefreshToken).get(jti)
+        token.expires_at = datetime.datetime.utcnow() - datetime.timedelta(days=1)
+    test_database.session.commit()
+
+    assert purge_expired_refresh_tokens(batch_size=2) == 3
+    assert [token.jti for token in RefreshToken.query.all()] == [active_jti]
@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from project import cache
+from project.api.users.crud import get_user_by_email, get_user_by_id, user_cache_key
+from project.api.users.models import User
+
+
+@pytest.fixture(scope="function")
+def replica(test_app, test_database, monkeypatch, tmp_path):
+    """Second database standing for read replica which never catches up"""
+    monkeypatch.setitem(
+        test_app.config,
+        "SQLALCHEMY_BINDS",
+        {"replica": f"sqlite:///{tmp_path / 'replica.sqlite3'}"},
+    )
+    engine = test_database.get_engine(bind="replica")
+    test_database.metadata.create_all(engine)
+    test_database.session.remove()
+    yield engine
+    test_database.session.remove()
+    engine.dispose()
+
+
+def test_reads_go_to_replica(test_app, replica):
+    replica.execute(
+        User.__table__.insert(),
+        username="jane",
+        email="jane@example.com",
+        password="",
+        active=True,
+        token_version=0,
+    )
+
+    client = test_app.test_client()
+    response = client.get("/users")
+    data = json.loads(response.data.decode())
+
+    assert response.status_code == 200
+    assert [user["email"] for user in data] == ["jane@example.com"]
+
+
+def test_reads_after_write_go_to_primary(test_app, test_database, replica, add_user):
+    add_user("joe", "joe@example.com")
+
+    assert get_user_by_email("joe@example.com").username == "joe"
+
+    test_database.session.remove()
+    assert get_user_by_email("joe@example.com") is None
+
+
+def test_client_sticks_to_primary_after_write(
+    test_app, test_database, replica, create_payload, monkeypatch
+):
+    client = test_app.test_client()
+    response = client.post(
+        "/users",
+        **create_payload(username="joe", email="joe@example.com", password="secret"),
+    )
+    (user_id,) = test_database.engine.execute(User.__table__.select()).first()[:1]
+    cookie = response.headers["Set-Cookie"]
+
+    assert response.status_code == 201
+    assert "read_primary=1" in cookie
+    assert "Max-Age=5" in cookie
+    assert "HttpOnly" in cookie
+    assert client.get(f"/users/{user_id}").status_code == 200
+
+    # other clients, e.g. behind the same proxy, keep reading from replica
+    assert test_app.test_client().get(f"/users/{user_id}").status_code == 404
+
+    monkeypatch.setitem(test_app.config, "DATABASE_REPLICA_STICKY_SECONDS", 0)
+    client = test_app.test_client()
+    response = client.post(
+        "/users",
+        **create_payload(username="jo", email="jo@example.com", password="secret"),
+    )
+    assert "Set-Cookie" not in response.headers
+    assert client.get(f"/users/{user_id}").status_code == 404
+
+
+def test_user_cache_filled_from_primary(
+    test_app, test_database, replica, add_user, monkeypatch
+):
+    monkeypatch.setitem(test_app.config, "CACHE_ENABLED", True)
+    cache.reset()
+    user_id = add_user("joe", "joe@example.com").id
+    test_database.session.remove()
+
+    # replica has not seen the user yet
+    assert get_user_by_id(user_id).username == "joe"
+    assert cache.get(user_cache_key(user_id))["username"] == "joe"
+    cache.reset()
+
+
+def test_user_cache_skipped_when_reading_from_primary(
+    test_app, test_database, replica, add_user, monkeypatch
+):
+    monkeypatch.setitem(test_app.config, "CACHE_ENABLED", True)
+    cache.reset()
+    user = add_user("joe", "joe@example.com")
+    user_id = user.id
+    cache.set(user_cache_key(user_id), {"id": user_id, "username": "old"})
+    test_database.session.remove()
+
+    test_database.session.info["primary"] = True
+    assert get_user_by_id(user_id).username == "joe"
+    cache.reset()
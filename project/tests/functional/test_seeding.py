@@ -0,0 +1,15 @@
+from project.api.users.crud import get_user_by_email
+from project.api.users.models import User
+from project.api.users.seeding import generate_users, seed_users
+
+
+def test_seed_users(test_app, test_database):
+    inserted = seed_users(25, seed=3, batch_size=10, echo=lambda line: None)
+
+    assert inserted == 25
+    assert User.query.count() == 25
+
+    _, email, password = list(generate_users(25, seed=3))[-1]
+    assert get_user_by_email(email).check_password(password)
+
+    assert seed_users(25, seed=3, batch_size=10, echo=lambda line: None) == 0
@@ -0,0 +1,80 @@
+import logging
+
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+
+def parse_server_timing(header):
+    metrics = {}
+    for metric in header.split(", "):
+        name, *params = metric.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+def test_server_timing(test_app, test_database, add_user, create_payload):
+    add_user("joe", "joe@example.com", "secret")
+
+    client = test_app.test_client()
+    response = client.post(
+        "/auth/login", **create_payload(email="joe@example.com", password="secret")
+    )
+    metrics = parse_server_timing(response.headers["Server-Timing"])
+
+    assert response.status_code == 200
+    assert set(metrics) == {"app", "db", "hash", "token"}
+    assert float(metrics["hash"]["dur"]) > 0
+    assert float(metrics["token"]["dur"]) > 0
+    assert float(metrics["app"]["dur"]) >= float(metrics["db"]["dur"])
+    assert metrics["db"]["desc"] != '"0 queries"'
+
+
+def test_server_timing_unknown_email(test_app, test_database, create_payload):
+    client = test_app.test_client()
+    response = client.post(
+        "/auth/login", **create_payload(email="joe@example.com", password="secret")
+    )
+    metrics = parse_server_timing(response.headers["Server-Timing"])
+
+    assert response.status_code == 401
+    assert float(metrics["hash"]["dur"]) > 0
+
+
+def test_excess_queries_logged(test_app, test_database, add_user, monkeypatch, caplog):
+    monkeypatch.setitem(test_app.config, "REQUEST_TIMING_MAX_QUERIES", 0)
+    user = add_user("joe", "joe@example.com")
+
+    client = test_app.test_client()
+    with caplog.at_level(logging.INFO, logger="project.timing"):
+        client.get(f"/users/{user.id}")
+
+    assert "excess queries" in caplog.text
+    assert '"endpoint": "users_users"' in caplog.text
+
+
+def test_server_timing_disabled(test_app, monkeypatch):
+    monkeypatch.setitem(test_app.config, "REQUEST_TIMING_ENABLED", False)
+
+    client = test_app.test_client()
+    response = client.get("/ping")
+
+    assert "Server-Timing" not in response.headers
+
+
+def test_server_timing_header_disabled(test_app, monkeypatch, caplog):
+    monkeypatch.setitem(test_app.config, "REQUEST_TIMING_HEADER", False)
+
+    client = test_app.test_client()
+    with caplog.at_level(logging.INFO, logger="project.timing"):
+        response = client.get("/ping")
+
+    assert "Server-Timing" not in response.headers
+    assert '"path": "/ping"' in caplog.text
+
+
+def test_failed_query_timing_discarded(test_app, test_database):
+    with test_database.engine.connect() as connection:
+        with pytest.raises(DBAPIError):
+            connection.execute("SELECT * FROM missing_table")
+
+        assert connection.info["query_started"] == []
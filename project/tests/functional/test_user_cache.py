@@ -0,0 +1,190 @@
+import json
+
+import pytest
+
+from project import cache
+from project.api.auth.crud import revoke_user_refresh_tokens
+from project.api.users.crud import (
+    bump_token_version,
+    delete_user,
+    get_token_version,
+    get_user_by_id,
+    is_token_version_stale,
+    token_version_key,
+    update_user,
+)
+from project.api.users.models import User
+
+
+@pytest.fixture(scope="function", params=["memory", "sqlite"])
+def user_cache(test_app, monkeypatch, tmp_path, request):
+    monkeypatch.setitem(test_app.config, "CACHE_ENABLED", True)
+    monkeypatch.setitem(test_app.config, "CACHE_BACKEND", request.param)
+    monkeypatch.setitem(
+        test_app.config, "CACHE_SQLITE_PATH", str(tmp_path / "cache.sqlite3")
+    )
+    cache.reset()
+    yield cache
+    cache.reset()
+
+
+def test_get_user_by_id_cached(test_app, test_database, add_user, user_cache):
+    user_id = add_user("joe", "joe@example.com", "secret").id
+
+    get_user_by_id(user_id)
+    test_database.session.remove()
+    user = get_user_by_id(user_id)
+
+    assert user_cache.stats()["hits"] == 1
+    assert user.username == "joe"
+    assert user.check_password("secret")
+
+
+def test_update_user_invalidates_cache(test_app, test_database, add_user, user_cache):
+    user_id = add_user("joe", "joe@example.com").id
+
+    update_user(get_user_by_id(user_id), "jack", "joe@example.com")
+    test_database.session.remove()
+
+    assert get_user_by_id(user_id).username == "jack"
+    assert user_cache.stats()["hits"] == 0
+
+
+def test_delete_user_invalidates_cache(test_app, test_database, add_user, user_cache):
+    user_id = add_user("joe", "joe@example.com").id
+
+    delete_user(get_user_by_id(user_id))
+
+    assert get_user_by_id(user_id) is None
+
+
+def test_revoked_claims_are_stale(
+    test_app, test_database, add_user, user_cache, create_payload
+):
+    user = add_user("joe", "joe@example.com")
+    user_id = user.id
+    access_token = User.encode_token(user.id, "access", user.token_claims()).decode()
+
+    assert not is_token_version_stale(user_id, 0)
+    revoke_user_refresh_tokens(user_id)
+    assert is_token_version_stale(user_id, 0)
+    assert not is_token_version_stale(user_id, 1)
+
+    client = test_app.test_client()
+    response = client.get("/auth/status", **create_payload(auth_token=access_token))
+    data = json.loads(response.data.decode())
+
+    assert response.status_code == 401
+    assert "invalid token" in data["message"].lower()
+
+
+def test_revoked_claims_stale_after_cache_miss(
+    test_app, test_database, add_user, user_cache
+):
+    user_id = add_user("joe", "joe@example.com").id
+    revoke_user_refresh_tokens(user_id)
+
+    user_cache.delete(token_version_key(user_id))
+
+    assert is_token_version_stale(user_id, 0)
+
+
+def test_claims_of_deleted_user_are_stale(
+    test_app, test_database, add_user, user_cache
+):
+    user_id = add_user("joe", "joe@example.com").id
+    assert not is_token_version_stale(user_id, 0)
+
+    delete_user(get_user_by_id(user_id))
+
+    assert get_token_version(user_id) is None
+    assert is_token_version_stale(user_id, 0)
+
+
+def test_token_version_cache_ttl(
+    test_app, test_database, add_user, user_cache, monkeypatch
+):
+    user_id = add_user("joe", "joe@example.com").id
+
+    get_token_version(user_id)
+    # bumped by other process behind the back of this one
+    User.query.filter_by(id=user_id).update({"token_version": 3})
+    test_database.session.commit()
+
+    assert get_token_version(user_id) == 0
+    assert get_token_version(user_id, cached=False) == 3
+
+    if not user_cache.shared:
+        user_cache.delete(token_version_key(user_id))
+        monkeypatch.setitem(test_app.config, "TOKEN_VERSION_LOCAL_TTL", 0)
+        get_token_version(user_id)
+        User.query.filter_by(id=user_id).update({"token_version": 4})
+        test_database.session.commit()
+        assert get_token_version(user_id) == 4
+
+
+@pytest.mark.parametrize("verify_db", [False, True])
+def test_status_rejects_token_bumped_by_other_process(
+    test_app,
+    test_database,
+    add_user,
+    user_cache,
+    create_payload,
+    monkeypatch,
+    verify_db,
+):
+    monkeypatch.setitem(test_app.config, "AUTH_STATUS_VERIFY_DB", verify_db)
+    monkeypatch.setitem(test_app.config, "TOKEN_VERSION_LOCAL_TTL", 0)
+    user = add_user("joe", "joe@example.com")
+    user_id = user.id
+    access_token = User.encode_token(user.id, "access", user.token_claims()).decode()
+    get_user_by_id(user_id)
+    test_database.session.remove()
+
+    client = test_app.test_client()
+    payload = create_payload(auth_token=access_token)
+    assert client.get("/auth/status", **payload).status_code == 200
+
+    if user_cache.shared:
+        # shared cache is updated by the other process
+        bump_token_version(user_id)
+    else:
+        User.query.filter_by(id=user_id).update({"token_version": 1})
+    test_database.session.commit()
+
+    assert client.get("/auth/status", **payload).status_code == 401
+
+
+def test_update_user_keeps_concurrent_bump(
+    test_app, test_database, add_user, user_cache
+):
+    user_id = add_user("joe", "joe@example.com").id
+    get_user_by_id(user_id)
+    test_database.session.remove()
+    user = get_user_by_id(user_id)
+    assert user_cache.stats()["hits"] == 1
+
+    User.query.filter_by(id=user_id).update({"token_version": 3, "version": 5})
+    test_database.session.commit()
+    update_user(user, "jack", "joe@example.com")
+
+    test_database.session.remove()
+    user = User.query.get(user_id)
+    assert user.token_version == 4
+    assert user.version == 6
+    assert get_token_version(user_id) == 4
+
+
+def test_status_claims_without_query(
+    test_app, test_database, add_user, user_cache, create_payload
+):
+    user = add_user("joe", "joe@example.com")
+    access_token = User.encode_token(user.id, "access", user.token_claims()).decode()
+
+    client = test_app.test_client()
+    payload = create_payload(auth_token=access_token)
+    client.get("/auth/status", **payload)
+    response = client.get("/auth/status", **payload)
+
+    assert response.status_code == 200
+    assert 'desc="0 queries"' in response.headers["Server-Timing"]
@@ -1,3 +1,4 @@
+from project import db
 from project.api.users.models import User
 
 
@@ -31,3 +32,36 @@ def test_decode_refresh_token(test_app, test_database, add_user):
     token = User.encode_token(user.id, "refresh")
     assert isinstance(token, bytes)
     assert User.decode_token(token) == user.id
+
+
+def test_encode_access_token_with_claims(test_app, test_database, add_user):
+    user = add_user("aaa", "aaa@example.com", "xyz")
+    token = User.encode_token(user.id, "access", user.token_claims())
+    payload = User.decode_token_payload(token)
+    assert payload["sub"] == user.id
+    assert payload["user"] == {
+        "username": "aaa",
+        "email": "aaa@example.com",
+        "active": True,
+        "ver": 0,
+    }
+
+
+def test_check_password_does_not_commit(test_app, test_database, add_user, monkeypatch):
+    user = add_user("aaa", "aaa@example.com", "xyz")
+    monkeypatch.setitem(test_app.config, "BCRYPT_LOG_ROUNDS", 5)
+    user.username = "changed"
+
+    assert user.check_password("xyz")
+    assert user.needs_rehash()
+
+    db.session.rollback()
+    assert User.query.get(user.id).username == "aaa"
+
+
+def test_needs_rehash_disabled(test_app, test_database, add_user, monkeypatch):
+    user = add_user("aaa", "aaa@example.com", "xyz")
+    monkeypatch.setitem(test_app.config, "BCRYPT_LOG_ROUNDS", 5)
+    monkeypatch.setitem(test_app.config, "BCRYPT_REHASH_ON_LOGIN", False)
+
+    assert not user.needs_rehash()
@@ -1,9 +1,19 @@
 import json
+from datetime import datetime
 
 import pytest
+from sqlalchemy import inspect
+from sqlalchemy.exc import IntegrityError
 
+import project.api.users.views
 from project import bcrypt, db  # noqa
-from project.api.users.crud import get_user_by_id
+from project.api.users import crud
+from project.api.users.crud import (
+    get_user_by_email,
+    get_user_by_id,
+    get_users_page,
+    get_users_page_state,
+)
 from project.api.users.models import User  # noqa
 
 
@@ -56,6 +66,52 @@ def test_add_user_duplicated_email(test_app, test_database, create_payload):
     assert "already exists" in data["message"]
 
 
+def test_add_user_duplicated_email_case(test_app, test_database, create_payload):
+    client = test_app.test_client()
+    client.post(
+        "/users",
+        **create_payload(username="joe", email="joe@example.com", password="123"),
+    )
+    response = client.post(
+        "/users",
+        **create_payload(username="joe", email=" Joe@Example.com", password="123"),
+    )
+    data = json.loads(response.data.decode())
+    assert response.status_code == 400
+    assert "already exists" in data["message"]
+
+
+def test_get_user_by_email_ignores_case(test_app, test_database, add_user):
+    user = add_user("joe", "Joe@Example.com")
+
+    assert user.email == "joe@example.com"
+    assert get_user_by_email("JOE@example.com").id == user.id
+
+
+def test_password_is_deferred(test_app, test_database, add_user):
+    add_user("joe", "joe@example.com", "secret")
+    test_database.session.remove()
+
+    user = get_user_by_email("joe@example.com")
+    assert "password" not in inspect(user).dict
+    assert user.check_password("secret")
+
+    test_database.session.remove()
+    user = get_user_by_email("joe@example.com", with_password=True)
+    assert "password" in inspect(user).dict
+
+
+def test_get_users_page_rows(test_app, test_database, add_user):
+    add_user("joe", "joe@example.com")
+
+    (row,), next_cursor, state = get_users_page(10)
+
+    assert row.username == "joe"
+    assert "password" not in row.keys()
+    assert next_cursor is None
+    assert state == get_users_page_state(10)
+
+
 def test_get_user(test_app, test_database, add_user, create_payload):
     username = "joe"
     email = "joe@example.com"
@@ -101,6 +157,52 @@ def test_get_all_users(test_app, test_database, add_user, create_payload):
         assert "password" not in data[index]
 
 
+def test_get_all_users_pagination(test_app, test_database, add_user):
+    created_date = datetime(2020, 1, 1)
+    for name in ("joe", "jane", "jack"):
+        user = add_user(name, f"{name}@example.com")
+        user.created_date = created_date
+    test_database.session.commit()
+
+    client = test_app.test_client()
+    response1 = client.get("/users?limit=2")
+    data1 = json.loads(response1.data.decode())
+
+    assert response1.status_code == 200
+    assert [entry["username"] for entry in data1] == ["joe", "jane"]
+
+    next_url = response1.headers["Link"].split(";")[0].strip("<>")
+    response2 = client.get(next_url)
+    data2 = json.loads(response2.data.decode())
+
+    assert response2.status_code == 200
+    assert [entry["username"] for entry in data2] == ["jack"]
+    assert "Link" not in response2.headers
+
+
+def test_get_all_users_with_invalid_cursor(test_app, test_database):
+    client = test_app.test_client()
+    response = client.get("/users?cursor=invalid")
+    data = json.loads(response.data.decode())
+
+    assert response.status_code == 400
+    assert "Invalid cursor" in data["message"]
+
+
+def test_export_users(test_app, test_database, add_user):
+    add_user("joe", "joe@example.com")
+    add_user("jane", "jane@example.com")
+
+    client = test_app.test_client()
+    response = client.get("/users/export")
+    lines = response.data.decode().splitlines()
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert [json.loads(line)["username"] for line in lines] == ["joe", "jane"]
+    assert all("password" not in json.loads(line) for line in lines)
+
+
 def test_delete_user(test_app, test_database, add_user, create_payload):
     username = "joe"
     email = "joe@example.com"
@@ -177,6 +279,34 @@ def test_update_user_with_password(test_app, test_database, add_user, create_pay
     assert not bcrypt.check_password_hash(user.password, password2)
 
 
+def test_update_user_email_taken_concurrently(
+    test_app, test_database, add_user, create_payload, monkeypatch
+):
+    add_user("joe", "joe@example.com")
+    user = add_user("jane", "jane@example.com")
+    # the other user takes the email right after it was checked
+    monkeypatch.setattr(
+        project.api.users.views, "get_user_by_email", lambda email: user
+    )
+
+    payload = create_payload(username="jane", email="Joe@example.com")
+    client = test_app.test_client()
+    response = client.put(f"/users/{user.id}", **payload)
+    data = json.loads(response.data.decode())
+
+    assert response.status_code == 400
+    assert "already taken" in data["message"]
+    assert get_user_by_id(user.id).email == "jane@example.com"
+
+
+def test_add_user_other_integrity_error(test_app, test_database):
+    with pytest.raises(IntegrityError):
+        crud.add_user(None, "joe@example.com", "secret")
+
+    assert crud.add_user("joe", "joe@example.com", "secret")
+    assert crud.add_user("joe", "JOE@example.com", "secret") is None
+
+
 @pytest.mark.parametrize(
     "user_id, user_data, status_code, message",
     [
@@ -196,3 +326,63 @@ def test_update_user_with_invalid_payload(
 
     assert response.status_code == status_code
     assert message in data["message"]
+
+
+def test_bulk_add_users(test_app, test_database, add_user, create_payload):
+    add_user("joe", "joe@example.com")
+    users = [
+        {"username": "jane", "email": "jane@example.com", "password": "123"},
+        {"username": "joe", "email": "Joe@example.com", "password": "123"},
+        {"username": "jack"},
+        {"username": "jane", "email": "jane@example.com", "password": "123"},
+    ]
+
+    client = test_app.test_client()
+    response = client.post(
+        "/users/bulk", data=json.dumps(users), content_type="application/json"
+    )
+    data = json.loads(response.data.decode())
+
+    assert response.status_code == 200
+    assert (data["created"], data["exists"], data["invalid"]) == (1, 2, 1)
+    assert [result["status"] for result in data["results"]] == [
+        "created",
+        "exists",
+        "invalid",
+        "exists",
+    ]
+    assert "email" in data["results"][2]["errors"]
+    assert get_user_by_email("jane@example.com").check_password("123")
+
+
+def test_bulk_add_users_ndjson(test_app, test_database):
+    lines = [
+        json.dumps({"username": "jane", "email": "jane@example.com", "password": "1"}),
+        "not json",
+        "",
+    ]
+
+    client = test_app.test_client()
+    response = client.post(
+        "/users/bulk", data="\n".join(lines), content_type="application/x-ndjson"
+    )
+    data = json.loads(response.data.decode())
+
+    assert response.status_code == 200
+    assert (data["created"], data["exists"], data["invalid"]) == (1, 0, 1)
+
+
+@pytest.mark.parametrize(
+    "payload, status_code", [[{"username": "joe"}, 400], [[{}] * 3, 413]]
+)
+def test_bulk_add_users_invalid_payload(
+    test_app, test_database, monkeypatch, payload, status_code
+):
+    monkeypatch.setitem(test_app.config, "USERS_BULK_MAX_ITEMS", 2)
+
+    client = test_app.test_client()
+    response = client.post(
+        "/users/bulk", data=json.dumps(payload), content_type="application/json"
+    )
+
+    assert response.status_code == status_code
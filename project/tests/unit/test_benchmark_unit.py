@@ -0,0 +1,42 @@
+from project.tests.benchmark.harness import find_regressions, percentile, summarize
+from project.tests.benchmark.json_encoding import measure
+
+
+def test_percentile():
+    values = list(range(1, 101))
+
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 0.99) == 99
+    assert percentile([7], 0.99) == 7
+    assert percentile([], 0.5) is None
+
+
+def test_summarize():
+    summary = summarize([0.003, 0.001, 0.002, 0.004], errors=1, elapsed=2)
+
+    assert summary["requests"] == 4
+    assert summary["errors"] == 1
+    assert summary["throughput"] == 2
+    assert round(summary["p50"], 6) == 2
+    assert round(summary["p99"], 6) == 4
+
+
+def test_find_regressions():
+    baseline = {"results": {"ping": {"p95": 1.0}, "status": {"p95": 2.0}}}
+    report = {
+        "results": {"ping": {"p95": 1.1}, "status": {"p95": 3.0}, "new": {"p95": 5}}
+    }
+
+    assert find_regressions(report, baseline, threshold=0.2) == [("status", 2.0, 3.0)]
+    assert find_regressions(report, baseline, threshold=0.05) == [
+        ("ping", 1.0, 1.1),
+        ("status", 2.0, 3.0),
+    ]
+
+
+def test_json_encoding_measure():
+    results = measure([10, 20], repeat=2)
+
+    assert set(results["stdlib"]) == {10, 20}
+    assert all(value > 0 for value in results["stdlib"].values())
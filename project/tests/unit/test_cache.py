@@ -0,0 +1,192 @@
+import datetime
+import os
+import sqlite3
+import stat
+import time
+
+import pytest
+
+from project.cache import (
+    LRUCache,
+    SQLiteCache,
+    create_backend,
+    default_sqlite_path,
+    prepare_sqlite_path,
+)
+
+
+def test_lru_cache_get_set():
+    cache = LRUCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_cache_expires_entries():
+    cache = LRUCache(max_size=2, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_lru_cache_delete():
+    cache = LRUCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.delete("a")
+    cache.delete("missing")
+
+    assert cache.get("a") is None
+
+
+def test_lru_cache_add():
+    cache = LRUCache(max_size=2, ttl=60)
+    cache.add("a", 1)
+    cache.add("a", 2)
+    cache.set("b", 1, ttl=0.01)
+    time.sleep(0.02)
+    cache.add("b", 2)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") == 2
+
+
+def test_sqlite_cache_add(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_size=10, ttl=60)
+    cache.add("a", 1)
+    cache.add("a", 2)
+    cache.set("b", 1, ttl=0.01)
+    time.sleep(0.02)
+    cache.add("b", 2)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") == 2
+
+
+def test_sqlite_cache_is_shared(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache1 = SQLiteCache(path, max_size=10, ttl=60)
+    cache2 = SQLiteCache(path, max_size=10, ttl=60)
+
+    cache1.set("a", {"id": 1})
+    assert cache2.get("a") == {"id": 1}
+
+    cache2.delete("a")
+    assert cache1.get("a") is None
+    assert cache1.stats()["misses"] == 1
+
+
+def test_sqlite_cache_evicts_and_expires(tmp_path):
+    cache = SQLiteCache(
+        str(tmp_path / "cache.sqlite3"), max_size=2, ttl=60, evict_interval=0
+    )
+    cache.set("a", 1, ttl=0.01)
+    cache.set("b", 2)
+    cache.set("c", 3)
+
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 2
+
+    cache.set("d", 4, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("d") is None
+    assert cache.get("c") == 3
+
+
+def test_sqlite_cache_evicts_periodically(tmp_path):
+    cache = SQLiteCache(
+        str(tmp_path / "cache.sqlite3"), max_size=1, ttl=60, evict_interval=60
+    )
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.stats()["size"] == 2
+
+    cache.evict()
+    assert cache.stats()["size"] == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_sqlite_cache_stores_json(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SQLiteCache(path, max_size=10, ttl=60)
+    created = datetime.datetime(2020, 1, 2, 3, 4, 5, 6)
+    value = {"id": 1, "active": True, "name": None, "created_date": created}
+
+    cache.set("a", value)
+
+    assert cache.get("a") == value
+    (raw,) = sqlite3.connect(path).execute("SELECT value FROM cache").fetchone()
+    assert isinstance(raw, str)
+    with pytest.raises(TypeError):
+        cache.set("b", object())
+
+
+def test_sqlite_cache_default_path_is_private(tmp_path, monkeypatch):
+    monkeypatch.setattr("tempfile.gettempdir", lambda: str(tmp_path))
+    cache = SQLiteCache(None, max_size=10, ttl=60)
+    cache.set("a", 1)
+
+    assert cache.path == default_sqlite_path()
+    assert cache.path.startswith(str(tmp_path))
+    directory = os.stat(os.path.dirname(cache.path))
+    assert stat.S_IMODE(directory.st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(cache.path).st_mode) == 0o600
+
+
+def test_sqlite_cache_refuses_shared_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr("tempfile.gettempdir", lambda: str(tmp_path))
+    directory = os.path.dirname(default_sqlite_path())
+    os.makedirs(directory)
+    os.chmod(directory, 0o777)
+
+    with pytest.raises(PermissionError):
+        prepare_sqlite_path(default_sqlite_path())
+
+
+def test_sqlite_cache_refuses_foreign_file(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    os.symlink(tmp_path / "elsewhere", path)
+    with pytest.raises(PermissionError):
+        prepare_sqlite_path(str(path))
+
+    if os.getuid() == 0:
+        path.unlink()
+        path.write_text("")
+        os.chown(path, 12345, 12345)
+        with pytest.raises(PermissionError):
+            prepare_sqlite_path(str(path))
+
+
+def test_create_backend(tmp_path):
+    config = {
+        "CACHE_BACKEND": "memory",
+        "CACHE_SQLITE_PATH": str(tmp_path / "cache.sqlite3"),
+        "CACHE_SQLITE_EVICT_INTERVAL": 1,
+        "CACHE_MAX_SIZE": 10,
+        "CACHE_TTL": 60,
+    }
+    assert isinstance(create_backend(config), LRUCache)
+
+    config["CACHE_BACKEND"] = "sqlite"
+    assert isinstance(create_backend(config), SQLiteCache)
+
+    config["CACHE_BACKEND"] = "unknown"
+    with pytest.raises(ValueError):
+        create_backend(config)
@@ -1,14 +1,20 @@
 import os
 
+from project.config import database_url
+
 
 def test_development_config(test_app):
     test_app.config.from_object("project.config.DevelopmentConfig")
     assert test_app.config["SECRET_KEY"] == "my_precious"
     assert not test_app.config["TESTING"]
-    assert test_app.config["SQLALCHEMY_DATABASE_URI"] == os.environ.get("DATABASE_URL")
+    assert test_app.config["SQLALCHEMY_DATABASE_URI"] == database_url("DATABASE_URL")
     assert test_app.config["BCRYPT_LOG_ROUNDS"] == 4
+    assert test_app.config["BCRYPT_EXECUTOR_WORKERS"] == 0
     assert test_app.config["ACCESS_TOKEN_EXPIRATION"] == 900
     assert test_app.config["REFRESH_TOKEN_EXPIRATION"] == 2592000
+    assert test_app.config["USERS_PAGE_SIZE"] == 100
+    assert test_app.config["USERS_MAX_PAGE_SIZE"] == 1000
+    assert test_app.config["USERS_EXPORT_BATCH_SIZE"] == 1000
 
 
 def test_testing_config(test_app):
@@ -16,19 +22,37 @@ def test_testing_config(test_app):
     assert test_app.config["SECRET_KEY"] == "my_precious"
     assert test_app.config["TESTING"]
     assert not test_app.config["PRESERVE_CONTEXT_ON_EXCEPTION"]
-    assert test_app.config["SQLALCHEMY_DATABASE_URI"] == os.environ.get(
+    assert test_app.config["SQLALCHEMY_DATABASE_URI"] == database_url(
         "DATABASE_TEST_URL"
     )
     assert test_app.config["BCRYPT_LOG_ROUNDS"] == 4
+    assert test_app.config["BCRYPT_EXECUTOR_WORKERS"] == 0
     assert test_app.config["ACCESS_TOKEN_EXPIRATION"] == 3
     assert test_app.config["REFRESH_TOKEN_EXPIRATION"] == 3
+    assert not test_app.config["CACHE_ENABLED"]
 
 
 def test_production_config(test_app):
     test_app.config.from_object("project.config.ProductionConfig")
     assert test_app.config["SECRET_KEY"] == os.getenv("SECRET_KEY", "my_precious")
     assert not test_app.config["TESTING"]
-    assert test_app.config["SQLALCHEMY_DATABASE_URI"] == os.environ.get("DATABASE_URL")
+    assert test_app.config["SQLALCHEMY_DATABASE_URI"] == database_url("DATABASE_URL")
     assert test_app.config["BCRYPT_LOG_ROUNDS"] == 13
+    assert test_app.config["BCRYPT_EXECUTOR_WORKERS"] >= 1
     assert test_app.config["ACCESS_TOKEN_EXPIRATION"] == 900
     assert test_app.config["REFRESH_TOKEN_EXPIRATION"] == 2592000
+    assert test_app.config["CACHE_ENABLED"]
+    assert test_app.config["USERS_PAGE_SIZE"] == 100
+    assert test_app.config["USERS_MAX_PAGE_SIZE"] == 1000
+    assert test_app.config["USERS_EXPORT_BATCH_SIZE"] == 1000
+
+
+def test_database_url(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "postgres://postgres@db:5432/users")
+    assert database_url("DATABASE_URL") == "postgresql://postgres@db:5432/users"
+
+    monkeypatch.setenv("DATABASE_URL", "postgresql+psycopg2://postgres@db/users")
+    assert database_url("DATABASE_URL") == "postgresql+psycopg2://postgres@db/users"
+
+    monkeypatch.delenv("DATABASE_URL")
+    assert database_url("DATABASE_URL") is None
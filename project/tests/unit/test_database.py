@@ -0,0 +1,46 @@
+from sqlalchemy.engine.url import make_url
+
+from project.config import BaseConfig, ProductionConfig
+from project.database import engine_options
+
+
+def config(config_class, **overrides):
+    return {**vars(BaseConfig), **vars(config_class), **overrides}
+
+
+def test_engine_options_postgres():
+    options = engine_options(
+        config(ProductionConfig, DATABASE_POOL_SIZE=20),
+        make_url("postgresql://postgres@db/users"),
+    )
+
+    assert options["pool_size"] == 20
+    assert options["max_overflow"] == BaseConfig.DATABASE_MAX_OVERFLOW
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"] == {
+        "options": "-c statement_timeout=30000"
+        " -c idle_in_transaction_session_timeout=60000"
+    }
+
+
+def test_engine_options_postgres_scheme():
+    options = engine_options(
+        config(ProductionConfig), make_url("postgres://postgres@db/users")
+    )
+
+    assert "statement_timeout=30000" in options["connect_args"]["options"]
+
+
+def test_engine_options_timeouts_disabled():
+    options = engine_options(
+        config(BaseConfig, DATABASE_STATEMENT_TIMEOUT=0),
+        make_url("postgresql://postgres@db/users"),
+    )
+
+    assert "connect_args" not in options
+
+
+def test_engine_options_sqlite():
+    options = engine_options(config(ProductionConfig), make_url("sqlite:////tmp/db"))
+
+    assert options == {}
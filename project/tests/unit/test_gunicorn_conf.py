@@ -0,0 +1,119 @@
+import importlib.util
+import io
+import os
+import pathlib
+import types
+
+import pytest
+
+PATH = pathlib.Path(__file__).parents[3] / "gunicorn.conf.py"
+
+
+@pytest.fixture(scope="function")
+def load_conf(monkeypatch):
+    """Factory to load gunicorn settings with given environment"""
+
+    def _load_conf(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        spec = importlib.util.spec_from_file_location("gunicorn_conf", PATH)
+        conf = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(conf)
+        return conf
+
+    return _load_conf
+
+
+@pytest.mark.parametrize(
+    "cpus, memory, expected", [(1, 4096, 3), (4, 4096, 9), (4, 512, 2), (8, 100, 1)]
+)
+def test_worker_count_limits(load_conf, cpus, memory, expected):
+    conf = load_conf()
+    assert conf.worker_count(cpus, memory * 1024 * 1024, 256) == expected
+
+
+def test_settings_from_environment(load_conf):
+    conf = load_conf(
+        PORT="8000",
+        GUNICORN_WORKERS="3",
+        GUNICORN_WORKER_CLASS="gevent",
+        GUNICORN_PRELOAD_APP="0",
+        GUNICORN_MAX_REQUESTS="50",
+    )
+
+    assert conf.bind == "0.0.0.0:8000"
+    assert conf.workers == 3
+    assert conf.worker_class == "gevent"
+    assert conf.threads == 1
+    assert conf.preload_app is False
+    assert conf.max_requests == 50
+
+
+def test_default_settings(load_conf):
+    conf = load_conf()
+
+    assert conf.worker_class == "gthread"
+    assert conf.workers >= 1
+    assert conf.threads == 4
+    assert conf.preload_app is True
+    assert conf.max_requests_jitter > 0
+    assert conf.cpu_count() >= 1
+    assert conf.memory_limit() > 0
+
+
+def test_on_starting_clears_metrics(load_conf, tmp_path):
+    (tmp_path / "metrics_1.json").write_text("{}")
+    conf = load_conf(METRICS_MULTIPROC_DIR=str(tmp_path))
+
+    conf.on_starting(None)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_exited_worker_metrics_archived(load_conf, test_app, tmp_path):
+    conf = load_conf(METRICS_MULTIPROC_DIR=str(tmp_path))
+    server = types.SimpleNamespace(app=types.SimpleNamespace(wsgi=lambda: test_app))
+    worker = types.SimpleNamespace(pid=os.getpid())
+
+    conf.worker_exit(server, worker)
+    assert (tmp_path / f"metrics_{os.getpid()}.json").exists()
+    conf.child_exit(server, worker)
+
+    assert not (tmp_path / f"metrics_{os.getpid()}.json").exists()
+    assert (tmp_path / "metrics_archive.json").exists()
+
+
+@pytest.mark.parametrize(
+    "files, expected",
+    [
+        ({"/sys/fs/cgroup/cpu.max": "200000 100000"}, 2),
+        ({"/sys/fs/cgroup/cpu.max": "max 100000"}, None),
+        (
+            {
+                "/sys/fs/cgroup/cpu/cpu.cfs_quota_us": "150000",
+                "/sys/fs/cgroup/cpu/cpu.cfs_period_us": "100000",
+            },
+            1,
+        ),
+        (
+            {
+                "/sys/fs/cgroup/cpu/cpu.cfs_quota_us": "-1",
+                "/sys/fs/cgroup/cpu/cpu.cfs_period_us": "100000",
+            },
+            None,
+        ),
+        ({}, None),
+    ],
+)
+def test_cpu_count_cgroup_quota(load_conf, monkeypatch, files, expected):
+    conf = load_conf()
+
+    def fake_open(path):
+        if path not in files:
+            raise FileNotFoundError(path)
+        return io.StringIO(files[path])
+
+    monkeypatch.setattr(conf, "open", fake_open, raising=False)
+    monkeypatch.setattr(conf.os, "sched_getaffinity", lambda pid: set(range(64)))
+
+    assert conf.cpu_count() == (64 if expected is None else expected)
@@ -0,0 +1,171 @@
+import json
+
+import pytest
+from flask import Flask
+
+import project.api.users.views
+from project import bcrypt
+from project.hashing import HasherBusy, PasswordHasher, calibrate_rounds, get_rounds
+
+
+@pytest.fixture(scope="function")
+def hasher():
+    """Password hasher whose process pool is shut down after the test"""
+    hasher = PasswordHasher()
+    yield hasher
+    hasher.shutdown()
+
+
+def test_inline_hashing(test_app, monkeypatch, hasher):
+    monkeypatch.setitem(test_app.config, "BCRYPT_EXECUTOR_WORKERS", 0)
+
+    pw_hash = hasher.generate_password_hash("secret")
+
+    assert bcrypt.check_password_hash(pw_hash, "secret")
+    assert hasher.check_password_hash(pw_hash, "secret")
+    assert not hasher.check_password_hash(pw_hash, "wrong")
+
+
+def test_pool_hashing(test_app, monkeypatch, hasher):
+    monkeypatch.setitem(test_app.config, "BCRYPT_EXECUTOR_WORKERS", 1)
+    monkeypatch.setitem(test_app.config, "BCRYPT_EXECUTOR_QUEUE_DEPTH", 1)
+
+    pw_hash = hasher.generate_password_hash("secret")
+
+    assert hasher.check_password_hash(pw_hash, "secret")
+    assert hasher.pending == 0
+
+
+def test_pool_hashing_busy(test_app, monkeypatch, hasher):
+    monkeypatch.setitem(test_app.config, "BCRYPT_EXECUTOR_WORKERS", 1)
+    monkeypatch.setitem(test_app.config, "BCRYPT_EXECUTOR_QUEUE_DEPTH", 0)
+
+    with pytest.raises(HasherBusy):
+        hasher.generate_password_hash("secret")
+
+
+def test_check_dummy_password(test_app, monkeypatch, hasher):
+    monkeypatch.setitem(test_app.config, "BCRYPT_EXECUTOR_WORKERS", 0)
+
+    assert not hasher.check_dummy_password("secret")
+    assert not hasher.check_dummy_password(None)
+    assert list(hasher._dummy_hashes) == [test_app.config["BCRYPT_LOG_ROUNDS"]]
+
+
+def test_needs_rehash(test_app, monkeypatch, hasher):
+    monkeypatch.setitem(test_app.config, "BCRYPT_EXECUTOR_WORKERS", 0)
+    pw_hash = hasher.generate_password_hash("secret")
+
+    assert get_rounds(pw_hash) == test_app.config["BCRYPT_LOG_ROUNDS"]
+    assert not hasher.needs_rehash(pw_hash)
+
+    monkeypatch.setitem(test_app.config, "BCRYPT_LOG_ROUNDS", 5)
+    assert hasher.needs_rehash(pw_hash)
+
+
+def test_calibrate_rounds():
+    rounds, timings, met = calibrate_rounds(
+        60, samples=1, min_rounds=4, max_rounds=5, floor=4
+    )
+    assert rounds == 5
+    assert met
+    assert [measured_rounds for measured_rounds, _ in timings] == [4, 5]
+
+    rounds, timings, met = calibrate_rounds(
+        0, samples=1, min_rounds=4, max_rounds=5, floor=4
+    )
+    assert rounds == 4
+    assert not met
+    assert len(timings) == 1
+
+
+def test_calibrate_rounds_floor():
+    rounds, timings, met = calibrate_rounds(60, samples=1, min_rounds=4, max_rounds=5)
+    assert rounds == 12
+    assert not met
+
+    rounds, _, met = calibrate_rounds(0, samples=1, min_rounds=4, max_rounds=5)
+    assert rounds == 12
+    assert not met
+
+
+def test_busy_hasher_response(test_app, monkeypatch, create_payload):
+    def mock_add_user(username, email, password):
+        raise HasherBusy()
+
+    monkeypatch.setattr(project.api.users.views, "add_user", mock_add_user)
+
+    client = test_app.test_client()
+    payload = create_payload(username="joe", email="joe@example.com", password="123")
+    response = client.post("/users", **payload)
+    data = json.loads(response.data.decode())
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert "busy" in data["message"]
+
+
+def test_busy_hasher_response_outside_api(test_app):
+    app = Flask(__name__)
+    app.config.from_object("project.config.TestingConfig")
+    PasswordHasher(app)
+
+    @app.route("/form")
+    def form():
+        raise HasherBusy()
+
+    response = app.test_client().get("/form")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert "busy" in response.get_json()["message"]
+
+
+def test_shutdown(test_app, monkeypatch, hasher):
+    monkeypatch.setitem(test_app.config, "BCRYPT_EXECUTOR_WORKERS", 1)
+    monkeypatch.setitem(test_app.config, "BCRYPT_EXECUTOR_QUEUE_DEPTH", 1)
+    hasher.generate_password_hash("secret")
+
+    hasher.shutdown()
+
+    assert hasher._executor is None
+    assert hasher.check_password_hash(hasher.generate_password_hash("a"), "a")
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_generate_password_hashes(test_app, monkeypatch, hasher, workers):
+    monkeypatch.setitem(test_app.config, "BCRYPT_EXECUTOR_WORKERS", workers)
+    monkeypatch.setitem(test_app.config, "BCRYPT_EXECUTOR_QUEUE_DEPTH", 1)
+
+    pw_hashes = hasher.generate_password_hashes(["a", "b", "c"])
+
+    assert len(pw_hashes) == 3
+    assert all(
+        bcrypt.check_password_hash(pw_hash, password)
+        for pw_hash, password in zip(pw_hashes, ["a", "b", "c"])
+    )
+    assert hasher.pending == 0
+
+
+def test_generate_password_hashes_takes_place_per_hash(test_app, monkeypatch, hasher):
+    monkeypatch.setitem(test_app.config, "BCRYPT_EXECUTOR_WORKERS", 2)
+    monkeypatch.setitem(test_app.config, "BCRYPT_EXECUTOR_QUEUE_DEPTH", 3)
+    submitted = []
+    submit = hasher._submit
+
+    def mock_submit(workers, func, *args):
+        submitted.append(hasher.pending)
+        return submit(workers, func, *args)
+
+    monkeypatch.setattr(hasher, "_submit", mock_submit)
+    # another request is waiting for the pool
+    hasher.pending = 1
+
+    assert len(hasher.generate_password_hashes(["a", "b", "c", "d"])) == 4
+    assert max(submitted) <= 2
+    assert hasher.pending == 1
+
+    hasher.pending = 3
+    with pytest.raises(HasherBusy):
+        hasher.generate_password_hashes(["a", "b"])
+    assert hasher.pending == 3
@@ -0,0 +1,92 @@
+import json
+
+from project.api.users.importer import CopyStream, prepare_rows, read_records
+
+PW_HASH = "$2b$04$" + "a" * 53
+
+
+def test_copy_stream_reads_in_chunks():
+    rows = [("joe", f"joe{index}@example.com", PW_HASH) for index in range(50)]
+    progress = []
+    stream = CopyStream(rows, on_progress=progress.append, progress_every=20)
+
+    chunks = []
+    chunk = stream.read(64)
+    while chunk:
+        assert len(chunk) <= 64
+        chunks.append(chunk)
+        chunk = stream.read(64)
+
+    lines = "".join(chunks).splitlines()
+    assert stream.count == 50
+    assert progress == [20, 40]
+    assert lines[0] == f"joe,joe0@example.com,{PW_HASH}"
+    assert len(lines) == 50
+
+
+def test_read_records(tmp_path):
+    csv_path = tmp_path / "users.csv"
+    csv_path.write_text(f"username,email,password\njoe,joe@example.com,{PW_HASH}\n")
+    ndjson_path = tmp_path / "users.ndjson"
+    ndjson_path.write_text(
+        json.dumps({"username": "joe", "email": "joe@example.com"}) + "\n\n"
+    )
+
+    assert list(read_records(str(csv_path))) == [
+        (2, {"username": "joe", "email": "joe@example.com", "password": PW_HASH})
+    ]
+    assert list(read_records(str(ndjson_path))) == [
+        (1, {"username": "joe", "email": "joe@example.com"})
+    ]
+
+
+def test_read_records_malformed_lines(tmp_path):
+    path = tmp_path / "users.ndjson"
+    path.write_bytes(
+        b'{"username": "joe"\n'
+        b"\n"
+        b'{"username": "\xff"}\n' + json.dumps({"username": "jane"}).encode() + b"\n"
+    )
+
+    assert list(read_records(str(path))) == [
+        (1, None),
+        (3, None),
+        (4, {"username": "jane"}),
+    ]
+
+
+def test_prepare_rows():
+    records = [
+        (1, {"username": "joe", "email": " Joe@Example.com", "password": PW_HASH}),
+        (2, {"username": "jane", "email": "jane@example.com", "password": "plain"}),
+        (3, {"username": "jack", "password": PW_HASH}),
+        (4, None),
+        (5, ["joe"]),
+        (6, {"username": "jim", "email": "jim@example.com", "password": 123}),
+        (7, {"username": "j" * 129, "email": "j@example.com", "password": PW_HASH}),
+        (8, {"username": "j\x00", "email": "j@example.com", "password": PW_HASH}),
+        (9, {"username": "jill", "email": "jill@example.com", "password": PW_HASH}),
+    ]
+    stats = {"rejected": 0}
+    rejected = []
+
+    rows = list(
+        prepare_rows(
+            records, stats, lambda line, reason: rejected.append((line, reason))
+        )
+    )
+
+    assert rows == [
+        ("joe", "joe@example.com", PW_HASH),
+        ("jill", "jill@example.com", PW_HASH),
+    ]
+    assert stats["rejected"] == 7
+    assert rejected == [
+        (2, "password is not bcrypt hash"),
+        (3, "email is missing or not a string"),
+        (4, "malformed line"),
+        (5, "malformed line"),
+        (6, "password is missing or not a string"),
+        (7, "username is too long"),
+        (8, "username contains NUL character"),
+    ]
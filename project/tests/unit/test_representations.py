@@ -0,0 +1,59 @@
+import datetime
+import json
+
+import pytest
+
+from project.api import representations
+from project.api.representations import dumps, output_json
+
+DATA = {
+    "id": 1,
+    "created_date": datetime.datetime(2020, 5, 17, 10, 30, 15, 120),
+    "birthday": datetime.date(1990, 1, 2),
+    "tags": ["a", "b"],
+}
+EXPECTED = {
+    "id": 1,
+    "created_date": "2020-05-17T10:30:15.000120",
+    "birthday": "1990-01-02",
+    "tags": ["a", "b"],
+}
+
+
+@pytest.mark.parametrize("backend", ["auto", "stdlib", "orjson"])
+def test_dumps(test_app, monkeypatch, backend):
+    monkeypatch.setitem(test_app.config, "JSON_BACKEND", backend)
+
+    assert representations.use_orjson() == (backend != "stdlib")
+    assert json.loads(dumps(DATA)) == EXPECTED
+    assert json.loads(dumps({1: "one"})) == {"1": "one"}
+
+
+def test_dumps_unsupported_type(test_app):
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
+
+
+def test_dumps_formatting_settings(test_app, monkeypatch):
+    monkeypatch.setitem(test_app.config, "RESTX_JSON", {"indent": 2})
+
+    assert dumps({"id": 1}) == b'{\n  "id": 1\n}'
+
+
+def test_dumps_orjson_missing(test_app, monkeypatch):
+    monkeypatch.setattr(representations, "orjson", None)
+    monkeypatch.setitem(test_app.config, "JSON_BACKEND", "auto")
+    assert json.loads(dumps(DATA)) == EXPECTED
+
+    monkeypatch.setitem(test_app.config, "JSON_BACKEND", "orjson")
+    with pytest.raises(RuntimeError):
+        dumps(DATA)
+
+
+def test_output_json(test_app):
+    response = output_json({"status": "success"}, 201, {"X-Test": "1"})
+
+    assert response.status_code == 201
+    assert response.headers["X-Test"] == "1"
+    assert response.data.endswith(b"\n")
+    assert json.loads(response.data) == {"status": "success"}
@@ -0,0 +1,19 @@
+import bcrypt
+
+from project.api.users.seeding import SEED_PASSWORDS, generate_users, precompute_hashes
+
+
+def test_generate_users_is_deterministic():
+    users = list(generate_users(100, seed=1))
+
+    assert users == list(generate_users(100, seed=1))
+    assert users != list(generate_users(100, seed=2))
+    assert len({email for _, email, _ in users}) == 100
+    assert users[17][2] == f"password{17 % SEED_PASSWORDS}"
+
+
+def test_precompute_hashes():
+    hashes = precompute_hashes()
+
+    assert len(hashes) == SEED_PASSWORDS
+    assert bcrypt.checkpw(b"password3", hashes["password3"].encode())
@@ -0,0 +1,88 @@
+import datetime
+import json
+from types import SimpleNamespace
+
+import pytest
+from flask_restx import Model, fields, marshal
+from sqlalchemy import create_engine
+
+import project.api.users.views
+from project.api.auth.views import tokens
+from project.api.serializers import Serializer, compile_model
+from project.api.users.views import user
+
+CREATED = datetime.datetime(2020, 5, 17, 10, 30, 15, 120)
+
+
+@pytest.fixture(scope="module")
+def row():
+    """Core row as returned by list reads"""
+    engine = create_engine("sqlite://")
+    return engine.execute(
+        "SELECT 1 AS id, 'joe' AS username, 'joe@example.com' AS email,"
+        " NULL AS created_date"
+    ).first()
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"id": 1, "username": "joe", "email": "joe@example.com", "created_date": None},
+        {"id": "2", "username": "jane", "created_date": CREATED},
+        SimpleNamespace(id=3, username="joe", email="j@e.com", created_date=CREATED),
+        SimpleNamespace(id=4),
+        [{"id": 1, "username": "joe"}, {"id": 2, "username": "jane"}],
+        [SimpleNamespace(id=5, username="joe", email=None, created_date=CREATED)],
+        [],
+    ],
+)
+def test_serializer_matches_marshal(data):
+    assert Serializer(user)(data) == marshal(data, user)
+
+
+def test_serializer_rows(row):
+    assert Serializer(user)(row) == marshal(dict(row), user)
+    assert Serializer(user)([row, row]) == [marshal(dict(row), user)] * 2
+
+
+def test_serializer_tokens():
+    data = {"access_token": "a", "refresh_token": "r"}
+    assert Serializer(tokens)(data) == marshal(data, tokens)
+
+
+def test_serializer_defaults_and_attributes():
+    model = Model(
+        "Custom",
+        {
+            "name": fields.String(attribute="username", default="anonymous"),
+            "active": fields.Boolean,
+            "score": fields.Float(default=1),
+            "created": fields.DateTime(dt_format="rfc822", attribute="created_date"),
+        },
+    )
+
+    for data in [{}, {"username": "joe", "active": "false", "score": "2.5"}]:
+        data = dict(data, created_date=CREATED)
+        assert Serializer(model)(data) == marshal(data, model)
+
+
+def test_compile_model_unsupported_fields():
+    model = Model("Nested", {"user": fields.Nested(user)})
+
+    with pytest.raises(TypeError):
+        compile_model(model, "attr")
+
+
+def test_mask_header_is_marshalled(test_app, monkeypatch):
+    def mock_get_users_page(limit, cursor=None):
+        users = [{"id": 1, "username": "joe", "email": "joe@example.com"}]
+        return users, None, (1, 1, 1, None)
+
+    monkeypatch.setattr(project.api.users.views, "get_users_page", mock_get_users_page)
+
+    client = test_app.test_client()
+    response = client.get("/users", headers={"X-Fields": "email"})
+    data = json.loads(response.data.decode())
+
+    assert response.status_code == 200
+    assert data == [{"email": "joe@example.com"}]
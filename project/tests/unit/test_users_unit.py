@@ -15,15 +15,9 @@ class AttrDict(dict):
 
 
 def test_add_user(test_app, monkeypatch, create_payload):
-    def mock_get_user_by_email(email):
-        return None
-
     def mock_add_user(username, email, password):
         return True
 
-    monkeypatch.setattr(
-        project.api.users.views, "get_user_by_email", mock_get_user_by_email
-    )
     monkeypatch.setattr(project.api.users.views, "add_user", mock_add_user)
 
     client = test_app.test_client()
@@ -65,15 +59,9 @@ def test_add_user_missing_email_key(test_app, monkeypatch, create_payload):
 
 
 def test_add_user_duplicated_email(test_app, monkeypatch, create_payload):
-    def mock_get_user_by_email(email):
-        return True
-
     def mock_add_user(username, email, password):
-        return True
+        return None
 
-    monkeypatch.setattr(
-        project.api.users.views, "get_user_by_email", mock_get_user_by_email
-    )
     monkeypatch.setattr(project.api.users.views, "add_user", mock_add_user)
 
     client = test_app.test_client()
@@ -90,12 +78,14 @@ def test_get_user(test_app, monkeypatch, create_payload):
     email = "joe@example.com"
 
     def mock_get_user_by_id(user_id):
-        return {
-            "id": user_id,
-            "username": username,
-            "email": email,
-            "created_date": datetime.now(),
-        }
+        return AttrDict(
+            id=user_id,
+            username=username,
+            email=email,
+            created_date=datetime.now(),
+            version=1,
+            updated_date=datetime.now(),
+        )
 
     monkeypatch.setattr(project.api.users.views, "get_user_by_id", mock_get_user_by_id)
 
@@ -128,10 +118,16 @@ def test_get_all_users(test_app, monkeypatch, create_payload):
         {"id": 2, "username": "jane", "email": "jane@example.com"},
     ]
 
-    def mock_get_all_users():
-        return user_data
+    def mock_get_users_page(limit, cursor=None):
+        return user_data, None, (len(user_data), 3, 2, None)
+
+    def mock_get_users_page_state(limit, cursor=None):
+        raise AssertionError("state is queried only to revalidate")
 
-    monkeypatch.setattr(project.api.users.views, "get_all_users", mock_get_all_users)
+    monkeypatch.setattr(project.api.users.views, "get_users_page", mock_get_users_page)
+    monkeypatch.setattr(
+        project.api.users.views, "get_users_page_state", mock_get_users_page_state
+    )
 
     client = test_app.test_client()
     response = client.get("/users")
@@ -142,6 +138,57 @@ def test_get_all_users(test_app, monkeypatch, create_payload):
     for index, user_entry in enumerate(user_data):
         assert user_entry["username"] in data[index]["username"]
         assert user_entry["email"] in data[index]["email"]
+    assert "Link" not in response.headers
+
+
+def test_get_all_users_next_page(test_app, monkeypatch, create_payload):
+    user_data = [{"id": 1, "username": "joe", "email": "joe@example.com"}]
+
+    def mock_get_users_page(limit, cursor=None):
+        assert limit == 1
+        return user_data, "next-cursor", (2, 3, 2, None)
+
+    monkeypatch.setattr(project.api.users.views, "get_users_page", mock_get_users_page)
+
+    client = test_app.test_client()
+    response = client.get("/users?limit=1")
+
+    assert response.status_code == 200
+    assert "cursor=next-cursor" in response.headers["Link"]
+    assert 'rel="next"' in response.headers["Link"]
+
+
+def test_get_all_users_invalid_cursor(test_app, monkeypatch, create_payload):
+    def mock_get_users_page(limit, cursor=None):
+        raise ValueError(cursor)
+
+    monkeypatch.setattr(project.api.users.views, "get_users_page", mock_get_users_page)
+
+    client = test_app.test_client()
+    response = client.get("/users?cursor=broken")
+    data = json.loads(response.data.decode())
+
+    assert response.status_code == 400
+    assert "Invalid cursor" in data["message"]
+
+
+def test_export_users(test_app, monkeypatch):
+    user_data = [
+        {"id": 1, "username": "joe", "email": "joe@example.com"},
+        {"id": 2, "username": "jane", "email": "jane@example.com"},
+    ]
+
+    def mock_iter_users(batch_size):
+        return iter(user_data)
+
+    monkeypatch.setattr(project.api.users.views, "iter_users", mock_iter_users)
+
+    client = test_app.test_client()
+    response = client.get("/users/export")
+    data = [json.loads(line) for line in response.data.decode().splitlines()]
+
+    assert response.status_code == 200
+    assert [entry["email"] for entry in data] == ["joe@example.com", "jane@example.com"]
 
 
 def test_delete_user(test_app, monkeypatch, create_payload):
@@ -0,0 +1,124 @@
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def timed(name):
+    """Adds time spent in the block to the timing of current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing = g.get("request_timing") if has_request_context() else None
+        if timing is not None:
+            timing[name] += time.perf_counter() - started
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_started"].pop()
+    timing = g.get("request_timing") if has_request_context() else None
+    if timing is not None:
+        timing["db"] += duration
+        timing["queries"] += 1
+        timing["statements"][statement] += 1
+
+
+def _handle_error(context):
+    # after_cursor_execute is not called for failed queries
+    if context.connection is not None and context.execution_context is not None:
+        started = context.connection.info.get("query_started")
+        if started:
+            started.pop()
+
+
+class RequestTiming:
+    """Measures where time of every request is spent.
+
+    Wall time, time and number of SQL queries and time spent hashing
+    passwords and encoding tokens are logged and, if
+    ``REQUEST_TIMING_HEADER`` is set, sent in ``Server-Timing`` header. The
+    header tells clients e.g. whether password was hashed, so it is not sent
+    in production. Requests issuing more than ``REQUEST_TIMING_MAX_QUERIES`` queries
+    or repeating the same query more than
+    ``REQUEST_TIMING_MAX_REPEATED_QUERIES`` times (likely N+1) are logged
+    as warnings.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+            event.listen(Engine, "handle_error", _handle_error)
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.extensions["request_timing"] = self
+
+    def _start(self):
+        if current_app.config["REQUEST_TIMING_ENABLED"]:
+            g.request_timing = {
+                "started": time.perf_counter(),
+                "db": 0.0,
+                "queries": 0,
+                "statements": Counter(),
+                "hash": 0.0,
+                "token": 0.0,
+            }
+
+    def _finish(self, response):
+        timing = g.pop("request_timing", None)
+        if timing is None:
+            return response
+
+        total = time.perf_counter() - timing["started"]
+        config = current_app.config
+        if config["REQUEST_TIMING_HEADER"]:
+            db_ms = timing["db"] * 1000
+            response.headers["Server-Timing"] = ", ".join(
+                [
+                    f"app;dur={total * 1000:.2f}",
+                    f'db;dur={db_ms:.2f};desc="{timing["queries"]} queries"',
+                    f"hash;dur={timing['hash'] * 1000:.2f}",
+                    f"token;dur={timing['token'] * 1000:.2f}",
+                ]
+            )
+
+        repeated = max(timing["statements"].values(), default=0)
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "duration_ms": round(total * 1000, 2),
+            "db_ms": round(timing["db"] * 1000, 2),
+            "queries": timing["queries"],
+            "max_repeated_queries": repeated,
+            "hash_ms": round(timing["hash"] * 1000, 2),
+            "token_ms": round(timing["token"] * 1000, 2),
+        }
+
+        if timing["queries"] > config["REQUEST_TIMING_MAX_QUERIES"]:
+            logger.warning("excess queries %s", json.dumps(record))
+        elif repeated > config["REQUEST_TIMING_MAX_REPEATED_QUERIES"]:
+            logger.warning("possible N+1 queries %s", json.dumps(record))
+        else:
+            logger.info("request %s", json.dumps(record))
+
+        return response